@@ -1,18 +1,52 @@
-from fastapi import FastAPI, HTTPException
+import logging
+import os
+import random
+import threading
+import time
+import warnings
+
+from fastapi import FastAPI, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
+from starlette.requests import ClientDisconnect
 from pathlib import Path
-import pandas as pd
 import numpy as np
-import joblib
 from pydantic import BaseModel
-from src.smart_predictor import (
-    compute_similarity,
-    compute_degree_score,
-    compute_prestige_score,
-    extract_domain_from_text,
+from starlette.concurrency import run_in_threadpool
+from src.feature_cache import ProfessorFeatureCache
+from src.metrics import (
+    NO_TIMER,
+    CallbackGauge,
+    Counter,
+    Histogram,
+    MetricsRegistry,
+    StageTimer,
+    request_started,
+)
+from src.micro_batcher import MicroBatcher
+from src.prediction_cache import PredictionCache
+from src.schemas import (
+    BatchPredictionRequest,
+    Course,
+    CourseRankingRequest,
+    Diploma,
+    Experience,
+    PastCourse,
+    PredictionRequest,
+    Professor,
+    ProfessorMatchRequest,
+    ndjson_line,
+    parse_prediction_line,
 )
+from src.model_registry import (
+    MODEL_TIERS,
+    REGISTRY_DIR as DEFAULT_REGISTRY_DIR,
+    LoadedModel,
+    ModelRegistry,
+    resolve_model,
+)
+from src.professor_index import INDEX_DIR, ProfessorIndex
 
 # ==========================================
 # 🚀 CONFIGURATION DE L'APPLICATION
@@ -36,109 +70,584 @@ app.add_middleware(
 # 🤖 CHARGEMENT DU NOUVEAU MODÈLE   
 # ==========================================
 MODEL_PATH = Path("models/model_contextual_randomforest.pkl")
+# Élève distillé (python -m src.model_distillation) : plus rapide, MAE quasi identique
+COMPACT_MODEL_PATH = Path("models/model_contextual_compact.pkl")
+TIER_PATHS = {"full": MODEL_PATH, "compact": COMPACT_MODEL_PATH}
+# Niveau servi, choisi au démarrage : MODEL_TIER=full|compact
+MODEL_TIER = os.environ.get("MODEL_TIER", "full")
+if MODEL_TIER not in MODEL_TIERS:
+    raise ValueError(f"MODEL_TIER={MODEL_TIER} inconnu (attendu : {', '.join(MODEL_TIERS)})")
+
+# Modèles historiques entraînés sur un DataFrame : le transformeur produit déjà leurs colonnes dans l'ordre
+warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+# Modèles historiques (régresseur seul, sans transformeur sauvegardé) : vectoriseur TF-IDF lu dans
+# `<modèle>.tfidf_vectorizer.pkl` (cf. src/model_registry.py) ; absent : ajustement par paire
+# Registre des versions (python -m src.model_registry register ...) : la plus récente du niveau
+# est servie. Sans version de ce niveau, l'API sert les artefacts historiques ci-dessus sous la
+# version "legacy-<niveau>" (export aplati .npz de python -m src.tree_export à la place du pickle s'il existe).
+REGISTRY_DIR = Path(os.environ.get("MODEL_REGISTRY_DIR", str(DEFAULT_REGISTRY_DIR)))
+registry = ModelRegistry(REGISTRY_DIR)
+# Si défini, /api/admin/* exige l'en-tête X-Admin-Token
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+
+
+def load_serving_model(version: str = None) -> LoadedModel:
+    """Charge une version du registre (la plus récente du niveau par défaut) ou les artefacts historiques."""
+    loaded = resolve_model(registry, MODEL_TIER, TIER_PATHS[MODEL_TIER], version)
+
+    missing = loaded.features.unknown_features()
+    if missing:
+        print(f"⚠️ Features du modèle non calculées par l'API (fixées à 0) : {missing}")
+    return loaded
+
+
+# Version servie : remplacée d'un bloc par /api/admin/reload. Chaque requête lit `serving`
+# une seule fois et n'utilise que cet objet : jamais de mélange entre deux versions.
 try:
-    model = joblib.load(MODEL_PATH)
-    print(f"✅ Modèle Random Forest chargé depuis {MODEL_PATH}")
+    serving = load_serving_model()
+    print(f"✅ Modèle {serving.version} ({serving.tier}) chargé depuis {serving.source}")
+    if serving.vectorizer is not None:
+        print("✅ Vectoriseur TF-IDF chargé")
 except Exception as e:
-    model = None
+    serving = None
     print(f"❌ Erreur lors du chargement du modèle : {e}")
 
+# Index des professeurs précalculé (python -m src.professor_index), en mémoire mappée
+professor_index = None
+if (INDEX_DIR / "meta.json").exists():
+    try:
+        professor_index = ProfessorIndex.load(INDEX_DIR)
+        print(f"✅ Index de {len(professor_index)} professeurs chargé depuis {INDEX_DIR}")
+    except Exception as e:
+        print(f"❌ Erreur lors du chargement de l'index des professeurs : {e}")
+
+# Cache LRU des features côté professeur (même profil envoyé avec plusieurs cours)
+PROFESSOR_CACHE_SIZE = int(os.environ.get("PROFESSOR_CACHE_SIZE", "2048"))
+professor_cache = ProfessorFeatureCache(maxsize=PROFESSOR_CACHE_SIZE)
+
+# Cache des résultats de /api/predict (mêmes paires renvoyées par le frontend), par version de modèle
+PREDICTION_CACHE_SIZE = int(os.environ.get("PREDICTION_CACHE_SIZE", "10000"))
+PREDICTION_CACHE_TTL_S = float(os.environ.get("PREDICTION_CACHE_TTL_S", "300"))
+prediction_cache = PredictionCache(maxsize=PREDICTION_CACHE_SIZE, ttl_s=PREDICTION_CACHE_TTL_S)
+
+# Micro-batching de /api/predict/async : un lot part à N lignes ou après M millisecondes
+MICROBATCH_MAX_SIZE = int(os.environ.get("MICROBATCH_MAX_SIZE", "64"))
+MICROBATCH_MAX_WAIT_MS = float(os.environ.get("MICROBATCH_MAX_WAIT_MS", "5"))
+batcher = MicroBatcher(
+    max_batch_size=MICROBATCH_MAX_SIZE,
+    max_wait_ms=MICROBATCH_MAX_WAIT_MS,
+)
+
+# Flux NDJSON de /api/predict/stream : lignes notées par blocs, une ligne reçue ne peut dépasser la limite
+STREAM_CHUNK_SIZE = int(os.environ.get("STREAM_CHUNK_SIZE", "256"))
+STREAM_MAX_LINE_BYTES = int(os.environ.get("STREAM_MAX_LINE_BYTES", str(1024 * 1024)))
+
+
+@app.on_event("startup")
+async def start_batcher():
+    await batcher.start()
+
+
+@app.on_event("shutdown")
+async def stop_batcher():
+    await batcher.stop()
+
 # ==========================================
-# 🧱 SCHÉMAS DE DONNÉES
+# 📈 MÉTRIQUES ET JOURNALISATION
 # ==========================================
-class Diploma(BaseModel):
-    level: str
-    title: str
+# LOG_LEVEL=DEBUG journalise chaque prédiction ; en INFO, seule une fraction LOG_SAMPLE_RATE l'est
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_SAMPLE_RATE = float(os.environ.get("LOG_SAMPLE_RATE", "0.01"))
+logging.basicConfig(level=LOG_LEVEL, format="%(asctime)s %(levelname)s %(name)s : %(message)s")
+logger = logging.getLogger("stationf.api")
+
+metrics = MetricsRegistry()
+REQUESTS = metrics.register(Counter(
+    "stationf_requests_total", "Requêtes HTTP traitées", ("route", "method", "status")
+))
+REQUEST_LATENCY = metrics.register(Histogram(
+    "stationf_request_duration_seconds", "Durée totale des requêtes HTTP", ("route", "method")
+))
+STAGE_LATENCY = metrics.register(Histogram(
+    "stationf_stage_duration_seconds", "Durée de chaque étape d'une prédiction (cumulée sur la requête)",
+    ("route", "stage"),
+))
+PREDICTED_ROWS = metrics.register(Counter(
+    "stationf_predicted_rows_total", "Lignes passées au modèle", ("route",)
+))
+metrics.register(CallbackGauge(
+    "stationf_model_info", "Version du modèle servie",
+    lambda: [({"version": serving.version, "tier": serving.tier}, 1)] if serving is not None else [],
+))
+metrics.register(CallbackGauge(
+    "stationf_professor_cache", "Cache des features professeur (hits, misses, size, maxsize)",
+    lambda: [({"stat": k}, v) for k, v in professor_cache.stats().items() if k != "hit_rate"],
+))
+metrics.register(CallbackGauge(
+    "stationf_prediction_cache", "Cache des résultats de /api/predict (hits, coalesced, approx_bytes...)",
+    lambda: [({"stat": k}, v) for k, v in prediction_cache.stats().items()],
+))
+metrics.register(CallbackGauge(
+    "stationf_microbatcher", "Micro-batching de /api/predict/async",
+    lambda: [({"stat": k}, v) for k, v in batcher.stats().items()],
+))
 
-class Experience(BaseModel):
-    company: str
-    title: str
-    description: str
-    duration: str
 
-class PastCourse(BaseModel):
-    title: str
-    description: str
-    numberOfStars: float
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    token = request_started.set(start)
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        request_started.reset(token)
+        # Gabarit de la route (et non le chemin brut) : nombre de séries borné
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        REQUEST_LATENCY.observe(time.perf_counter() - start, route=route, method=request.method)
+        REQUESTS.inc(route=route, method=request.method, status=str(status))
+
+
+def record_prediction(route: str, state: LoadedModel, y_pred, timer: StageTimer) -> None:
+    """Métriques d'une prédiction réussie, et journal échantillonné."""
+    timer.observe(STAGE_LATENCY, route=route)
+    PREDICTED_ROWS.inc(len(y_pred), route=route)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("%s : %d prédiction(s) %s (modèle %s)", route, len(y_pred), list(y_pred[:5]), state.version)
+    elif logger.isEnabledFor(logging.INFO) and random.random() < LOG_SAMPLE_RATE:
+        logger.info("✅ Prédiction réussie (%s, échantillon) : %.2f (modèle %s)", route, y_pred[0], state.version)
+
+# ==========================================
+# 🧮 CONSTRUCTION DES FEATURES
+# ==========================================
+# Le calcul des features est celui du transformeur sauvegardé avec le modèle (src/feature_pipeline.py) :
+# l'API ne fait qu'y brancher le cache des features professeur et le chronométrage par étape.
+def cached_professor_features(state: LoadedModel):
+    """Features côté professeur de la version servie, via le cache LRU (clé : payload + version)."""
+    def lookup(professor: dict, timer=NO_TIMER) -> dict:
+        return professor_cache.get_or_compute(
+            professor,
+            lambda payload: state.features.professor_features(payload, timer),
+            namespace=state.version,
+        )
+    return lookup
+
 
-class Professor(BaseModel):
-    fistname: str
-    lastname: str
-    city: str
-    description: str
-    diplomas: list[Diploma]
-    experiences: list[Experience]
-    pastCourses: list[PastCourse]
+def build_feature_matrix(state: LoadedModel, records: list[dict], timer=NO_TIMER) -> np.ndarray:
+    """Matrice float32 (schéma du modèle) d'un lot de paires `{"professor": ..., "course": ...}`."""
+    return state.features.transform(records, cached_professor_features(state), timer)
 
-class Course(BaseModel):
-    title: str
-    description: str
 
-class PredictionRequest(BaseModel):
-    professor: Professor
-    course: Course
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices des k meilleurs scores, triés par score décroissant (sélection partielle)."""
+    k = min(k, len(scores))
+    if k == 0:
+        return np.zeros(0, dtype=int)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind="stable")]
 
 
 # ==========================================
-# 🔮 ROUTE DE PRÉDICTION
+# 🔮 ROUTES DE PRÉDICTION
 # ==========================================
 @app.post("/api/predict")
 def predict(req: PredictionRequest):
-    if model is None:
+    timer = StageTimer.for_request()
+    state = serving
+    if state is None:
         raise HTTPException(status_code=500, detail="Modèle non chargé.")
 
+    def compute() -> float:
+        X = build_feature_matrix(state, [req.dict()], timer)
+
+        # 6️⃣ Prédiction
+        with timer.stage("inference"):
+            y_pred = state.predict(X)
+        record_prediction("/api/predict", state, y_pred, timer)
+        return float(y_pred[0])
+
+    try:
+        # Requête déjà vue (ou en cours de calcul) pour cette version du modèle : pas de nouvel appel
+        with timer.stage("result_cache"):
+            key = prediction_cache.key(req.dict(), state.version)
+        y_pred, status = prediction_cache.get_or_compute(key, compute)
+        if status != "miss":
+            timer.observe(STAGE_LATENCY, route="/api/predict")
+
+        return {"gradeAverage": round(y_pred, 2), "modelVersion": state.version}
+
+    except Exception as e:
+        logger.exception("Erreur de prédiction sur /api/predict")
+        raise HTTPException(status_code=500, detail=f"Erreur de prédiction : {e}")
+
+
+@app.post("/api/predict/async")
+async def predict_async(req: PredictionRequest):
+    """Même résultat que /api/predict, mais l'inférence est regroupée avec les requêtes concurrentes."""
+    timer = StageTimer.for_request()
+    state = serving
+    if state is None:
+        raise HTTPException(status_code=500, detail="Modèle non chargé.")
+
+    try:
+        # Features (TF-IDF, domaines) hors de la boucle d'événements : seule l'attente du lot y reste
+        X = await run_in_threadpool(build_feature_matrix, state, [req.dict()], timer)
+        # Le prédicteur voyage avec la ligne : un rechargement en cours de lot ne mélange pas les versions
+        # (l'inférence inclut ici l'attente du lot)
+        with timer.stage("inference"):
+            y_pred = await batcher.submit(X, state.predict)
+        record_prediction("/api/predict/async", state, [y_pred], timer)
+        return {"gradeAverage": round(float(y_pred), 2), "modelVersion": state.version}
+
+    except Exception as e:
+        logger.exception("Erreur de prédiction sur /api/predict/async")
+        raise HTTPException(status_code=500, detail=f"Erreur de prédiction : {e}")
+
+
+@app.post("/api/rank/courses")
+def rank_courses(req: CourseRankingRequest):
+    """Classe les cours candidats pour un professeur et renvoie les k meilleurs."""
+    timer = StageTimer.for_request()
+    state = serving
+    if state is None:
+        raise HTTPException(status_code=500, detail="Modèle non chargé.")
+    if not req.courses:
+        return {"ranking": [], "modelVersion": state.version}
+
     try:
-        prof = req.professor
-        course = req.course
-
-        # 1️⃣ Texte global du profil
-        profile_text = " ".join([
-            prof.description,
-            " ".join(d.title for d in prof.diplomas),
-            " ".join(e.title for e in prof.experiences),
-            " ".join(c.title for c in prof.pastCourses)
-        ])
-
-        # 2️⃣ Détection des domaines
-        prof_domain = extract_domain_from_text(profile_text)
-        course_domain = extract_domain_from_text(course.description)
-
-        # 3️⃣ Calcul des features (alignées avec ton modèle)
-        similarity = compute_similarity(profile_text, f"{course.title} {course.description}")
-        degree_score = compute_degree_score([d.dict() for d in prof.diplomas])
-        prestige_score = compute_prestige_score([e.dict() for e in prof.experiences])
-        avg_stars = np.mean([c.numberOfStars for c in prof.pastCourses])
-
-        features = {
-            "similarity": similarity,
-            "degree_score": degree_score,
-            "prestige_score": prestige_score,
-            "avg_stars": avg_stars,
+        # Même objet professeur pour toutes les paires : ses features sont calculées une fois
+        professor = req.professor.dict()
+        X = build_feature_matrix(state, [{"professor": professor, "course": c.dict()} for c in req.courses], timer)
+        with timer.stage("inference"):
+            scores = state.predict(X)
+        record_prediction("/api/rank/courses", state, scores, timer)
+        return {
+            "ranking": [
+                {"index": int(i), "title": req.courses[i].title, "gradeAverage": round(float(scores[i]), 2)}
+                for i in top_k_indices(scores, req.k)
+            ],
+            "modelVersion": state.version,
         }
 
-        # 4️⃣ Encodage des domaines (mêmes noms que dans ton modèle)
-        domains = ["informatique", "maths", "français", "physique", "chimie", "histoire"]
-        for d in domains:
-            features[f"prof_domain_{d}"] = 1 if prof_domain == d else 0
-            features[f"course_domain_{d}"] = 1 if course_domain == d else 0
+    except Exception as e:
+        logger.exception("Erreur de prédiction sur /api/rank/courses")
+        raise HTTPException(status_code=500, detail=f"Erreur de prédiction : {e}")
 
-        # 5️⃣ Préparation du DataFrame (sécurisée)
-        X = pd.DataFrame([features])
-        for col in model.feature_names_in_:
-            if col not in X.columns:
-                X[col] = 0
-        X = X[model.feature_names_in_]
 
-        # 6️⃣ Prédiction
-        y_pred = model.predict(X)[0]
-        print(f"✅ Prédiction réussie : {y_pred:.2f}")
+@app.post("/api/match/professors")
+def match_professors(req: ProfessorMatchRequest):
+    """Classe tous les professeurs de l'index pour un nouveau cours et renvoie les k meilleurs."""
+    timer = StageTimer.for_request()
+    state = serving
+    if state is None:
+        raise HTTPException(status_code=500, detail="Modèle non chargé.")
+    if professor_index is None:
+        raise HTTPException(status_code=503, detail="Index des professeurs non construit.")
+    # Index construit pour un autre modèle (vectoriseur, texte de profil) : pas prêt, plutôt qu'une erreur 500
+    reason = professor_index.incompatibility(state.features)
+    if reason is not None:
+        raise HTTPException(status_code=503, detail=reason)
 
-        return {"gradeAverage": round(float(y_pred), 2)}
+    try:
+        X = state.features.transform_index(professor_index, req.course.dict(), timer)
+        with timer.stage("inference"):
+            scores = state.predict(X)
+        record_prediction("/api/match/professors", state, scores, timer)
+        return {
+            "ranking": [
+                {**professor_index.professors[i], "index": int(i), "gradeAverage": round(float(scores[i]), 2)}
+                for i in top_k_indices(scores, req.k)
+            ],
+            "modelVersion": state.version,
+        }
 
     except Exception as e:
+        logger.exception("Erreur de prédiction sur /api/match/professors")
         raise HTTPException(status_code=500, detail=f"Erreur de prédiction : {e}")
 
 
+@app.get("/api/batcher/stats")
+def batcher_stats():
+    """Taille effective des lots du micro-batching."""
+    return batcher.stats()
+
+
+@app.get("/api/metrics", response_class=PlainTextResponse)
+def metrics_endpoint():
+    """Métriques au format texte Prometheus (latences par étape, requêtes, caches).
+
+    Sous serve.py avec plusieurs workers, chaque worker a ses propres compteurs : la réponse ne
+    couvre que le worker qui l'a servie (agréger côté Prometheus, ou lancer avec --workers 1).
+    """
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get("/api/cache/stats")
+def cache_stats():
+    """Compteurs des caches (features professeur, résultats de /api/predict) pour leur dimensionnement.
+
+    Caches propres à chaque worker sous serve.py : les compteurs sont ceux du worker qui répond.
+    """
+    return {"professor_features": professor_cache.stats(), "predictions": prediction_cache.stats()}
+
+
+@app.post("/api/predict/batch")
+def predict_batch(req: BatchPredictionRequest):
+    """Prédit toutes les paires du lot avec un seul appel au modèle."""
+    timer = StageTimer.for_request()
+    state = serving
+    if state is None:
+        raise HTTPException(status_code=500, detail="Modèle non chargé.")
+    if not req.items:
+        return {"predictions": [], "modelVersion": state.version}
+
+    try:
+        X = build_feature_matrix(state, [item.dict() for item in req.items], timer)
+        with timer.stage("inference"):
+            y_pred = state.predict(X)
+        record_prediction("/api/predict/batch", state, y_pred, timer)
+        return {
+            "predictions": [{"gradeAverage": round(float(y), 2)} for y in y_pred],
+            "modelVersion": state.version,
+        }
+
+    except Exception as e:
+        logger.exception("Erreur de prédiction sur /api/predict/batch")
+        raise HTTPException(status_code=500, detail=f"Erreur de prédiction : {e}")
+
+
+# ==========================================
+# 🌊 FLUX NDJSON (NOTATION DE CATALOGUE)
+# ==========================================
+async def ndjson_lines(request: Request):
+    """Lignes non vides du corps au fil de la réception : `(numéro de ligne, octets)`.
+
+    Seule la ligne en cours est gardée en mémoire ; au-delà de STREAM_MAX_LINE_BYTES,
+    `(numéro, None)` est produit et la lecture s'arrête.
+    """
+    buffer = b""
+    line_no = 0
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_no += 1
+            if line.strip():
+                yield line_no, line
+        if len(buffer) > STREAM_MAX_LINE_BYTES:
+            yield line_no + 1, None
+            return
+    if buffer.strip():
+        yield line_no + 1, buffer
+
+
+def score_stream_chunk(state: LoadedModel, records: list[dict]) -> list:
+    """Prédictions d'un bloc du flux (exécuté dans le pool de threads : la boucle reste libre)."""
+    timer = StageTimer()
+    X = build_feature_matrix(state, records, timer)
+    with timer.stage("inference"):
+        y_pred = state.predict(X)
+    record_prediction("/api/predict/stream", state, y_pred, timer)
+    return [round(float(y), 2) for y in y_pred]
+
+
+async def stream_predictions(request: Request, state: LoadedModel):
+    """Résultats NDJSON dans l'ordre des lignes reçues, bloc par bloc, pendant la réception.
+
+    Au plus STREAM_CHUNK_SIZE lignes sont en attente : le corps n'est lu que lorsque le client
+    consomme les résultats, la mémoire reste bornée quelle que soit la taille du flux.
+    """
+    pending = []  # (numéro de ligne, enregistrement | None, erreur | None)
+
+    async def flush() -> bytes:
+        records = [record for _, record, _ in pending if record is not None]
+        scores = iter(())
+        try:
+            if records:
+                scores = iter(await run_in_threadpool(score_stream_chunk, state, records))
+        except Exception as e:
+            logger.exception("Erreur de prédiction sur /api/predict/stream")
+            failure = f"Erreur de prédiction : {e}"
+            pending[:] = [(n, None, error or failure) for n, _, error in pending]
+        out = b"".join(
+            ndjson_line({"line": n, "error": error}) if record is None else ndjson_line({"gradeAverage": next(scores)})
+            for n, record, error in pending
+        )
+        pending.clear()
+        return out
+
+    async for line_no, line in ndjson_lines(request):
+        if line is None:
+            pending.append((line_no, None, f"ligne de plus de {STREAM_MAX_LINE_BYTES} octets : flux interrompu"))
+            break
+        record, error = parse_prediction_line(line)
+        pending.append((line_no, record, error))
+        if len(pending) >= STREAM_CHUNK_SIZE:
+            yield await flush()
+    if pending:
+        yield await flush()
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """StreamingResponse qui laisse le générateur lire le corps de la requête pendant l'envoi.
+
+    La version de Starlette écoute la déconnexion du client sur le même canal `receive` que
+    `request.stream()` et lui volerait le corps : ici, la déconnexion remonte par la lecture du corps.
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+
+
+@app.post("/api/predict/stream")
+async def predict_stream(request: Request):
+    """Note un flux NDJSON de PredictionRequest (une par ligne) et renvoie un flux NDJSON.
+
+    Une ligne de sortie par ligne non vide reçue, dans le même ordre : `{"gradeAverage": ...}`,
+    ou `{"line": n, "error": ...}` si la ligne est invalide (le flux continue). Tout le flux
+    est noté par la même version du modèle (en-tête X-Model-Version).
+    """
+    state = serving
+    if state is None:
+        raise HTTPException(status_code=500, detail="Modèle non chargé.")
+    return DuplexStreamingResponse(
+        stream_predictions(request, state),
+        media_type="application/x-ndjson",
+        headers={"X-Model-Version": state.version},
+    )
+
+
+# ==========================================
+# 🛠️ ADMINISTRATION DU MODÈLE
+# ==========================================
+class ReloadRequest(BaseModel):
+    version: str | None = None
+
+
+# Requête fictive jouée sur une nouvelle version avant de la servir (vectoriseur + modèle)
+WARMUP_REQUEST = PredictionRequest(
+    professor=Professor(
+        fistname="Warm", lastname="Up", city="Paris", description="Enseignant en informatique et mathématiques",
+        diplomas=[Diploma(level="Master", title="Informatique")],
+        experiences=[Experience(company="Sorbonne Université", title="Enseignant", description="Cours", duration="2 ans")],
+        pastCourses=[PastCourse(title="Python", description="Programmation", numberOfStars=4.5)],
+    ),
+    course=Course(title="Algorithmique", description="Structures de données et algorithmes"),
+)
+
+reload_lock = threading.Lock()
+reload_status = {"state": "idle", "version": None, "error": None, "queued": False}
+# Demande reçue pendant un rechargement (SIGHUP de serve.py) : rejouée à la fin de celui-ci.
+# Réentrant : un signal peut interrompre le gestionnaire du précédent dans le même thread.
+_reload_queue_lock = threading.RLock()
+_queued_reload = []  # au plus une version en attente (la dernière demandée)
+# Défini par serve.py avec plusieurs workers : /api/admin/reload passe par le processus parent,
+# qui relaie SIGHUP à tous les workers (sinon seul le worker ayant reçu la requête rechargerait)
+cluster_reload = None
+
+
+def check_admin_token(token: str | None) -> None:
+    if ADMIN_TOKEN and token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Jeton d'administration invalide.")
+
+
+def reload_model(version: str | None) -> None:
+    """Charge et chauffe une version hors du chemin des requêtes, puis la publie d'un bloc.
+
+    Une demande mise en attente pendant le chargement est traitée ensuite, avant de libérer le verrou.
+    """
+    released = False
+    try:
+        while True:
+            _load_and_publish(version)
+            with _reload_queue_lock:
+                if not _queued_reload:
+                    # Libéré sous le verrou de la file : aucune demande ne peut s'y glisser entre-temps
+                    reload_lock.release()
+                    released = True
+                    return
+                version = _queued_reload.pop()
+                reload_status.update(state="loading", version=version, error=None, queued=False)
+    finally:
+        if not released:
+            reload_lock.release()
+
+
+def _load_and_publish(version: str | None) -> None:
+    global serving
+    try:
+        state = load_serving_model(version)
+        state.predict(state.schema.empty(8))
+        state.predict_records([WARMUP_REQUEST.dict()])
+        # Remplacement atomique : les requêtes en cours terminent avec l'ancienne version
+        serving = state
+        professor_cache.clear()
+        prediction_cache.clear()
+        reload_status.update(state="idle", version=state.version, error=None)
+        logger.info("🔄 Modèle %s chargé depuis %s", state.version, state.source)
+    except Exception as e:
+        reload_status.update(state="failed", error=str(e))
+        logger.exception("❌ Échec du rechargement du modèle")
+
+
+def start_reload(version: str | None = None, queue: bool = False) -> bool:
+    """Lance `reload_model` en arrière-plan ; False si un rechargement est déjà en cours.
+
+    `queue` : la demande est alors mise en attente et rejouée à la fin du rechargement en cours
+    (serve.py, SIGHUP : chaque worker recharge sa propre copie du modèle, aucun signal n'est perdu).
+    """
+    with _reload_queue_lock:
+        if not reload_lock.acquire(blocking=False):
+            if queue:
+                _queued_reload[:] = [version]
+                reload_status["queued"] = True
+            return False
+        reload_status.update(state="loading", version=version, error=None)
+    threading.Thread(target=reload_model, args=(version,), name="model-reload", daemon=True).start()
+    return True
+
+
+@app.post("/api/admin/reload", status_code=202)
+def admin_reload(req: ReloadRequest | None = None, x_admin_token: str | None = Header(None)):
+    """Recharge le modèle (dernière version du registre, ou `version`) sans interrompre le service.
+
+    Sous serve.py avec plusieurs workers, tous les workers rechargent (SIGHUP relayé par le parent).
+    """
+    check_admin_token(x_admin_token)
+    version = req.version if req else None
+    if cluster_reload is not None:
+        if reload_lock.locked():
+            raise HTTPException(status_code=409, detail="Rechargement déjà en cours.")
+        try:
+            cluster_reload(version)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        return {"status": "loading", "version": version, "workers": "all"}
+    if not start_reload(version):
+        raise HTTPException(status_code=409, detail="Rechargement déjà en cours.")
+    return {"status": "loading", "version": version}
+
+
+@app.get("/api/admin/model")
+def admin_model(x_admin_token: str | None = Header(None)):
+    """Version servie, état du dernier rechargement et versions disponibles (du worker qui répond)."""
+    check_admin_token(x_admin_token)
+    state = serving
+    return {
+        "modelVersion": state.version if state else None,
+        "source": state.source if state else None,
+        "tier": state.tier if state else MODEL_TIER,
+        "reload": dict(reload_status),
+        "available": registry.versions(),
+    }
+
+
 # ==========================================
 # 🖥️ SERVEUR FRONTEND
 # ==========================================
@@ -0,0 +1,242 @@
+# ==========================================
+# 🚀 serve.py — Lancement multi-workers (hors ligne)
+# ==========================================
+# Le modèle est chargé une fois dans le processus parent, puis N workers sont créés par fork :
+# les tableaux du modèle sont partagés en copie sur écriture au lieu d'être dupliqués.
+#
+#   python serve.py --workers 4 --port 8000
+#   python serve.py --ngrok --open-browser   # tunnel public optionnel (NGROK_AUTHTOKEN)
+#   MODEL_TIER=compact python serve.py       # modèle distillé (python -m src.model_distillation)
+#
+# SIGINT / SIGTERM : arrêt propre (requêtes en cours terminées) ; SIGHUP : rechargement du
+# modèle dans chaque worker (dernière version du registre). POST /api/admin/reload passe par le
+# parent et recharge aussi tous les workers. /api/metrics, /api/cache/stats et /api/admin/model
+# décrivent le seul worker qui répond (compteurs et caches propres à chaque processus).
+import argparse
+import gc
+import multiprocessing
+import os
+import random
+import signal
+import socket
+import sys
+import time
+import webbrowser
+
+import uvicorn
+
+# --- CONFIGURATION ---
+HOST = os.environ.get("HOST", "0.0.0.0")
+PORT = int(os.environ.get("PORT", "8000"))
+WORKERS = int(os.environ.get("WEB_WORKERS", str(min(4, os.cpu_count() or 1))))
+GRACEFUL_TIMEOUT_S = 30.0
+BACKLOG = 2048
+RELOAD_VERSION_BYTES = 256  # nom de version transmis par /api/admin/reload aux workers
+
+
+# ==========================================
+# 🧵 WORKERS
+# ==========================================
+def bind_socket(host: str, port: int) -> socket.socket:
+    """Socket d'écoute partagé par tous les workers (le noyau répartit les connexions)."""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(BACKLOG)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(app_module, sock: socket.socket, log_level: str, graceful_timeout: float = GRACEFUL_TIMEOUT_S,
+               reload_version=lambda: None) -> None:
+    """Corps d'un worker (processus fils) : un serveur uvicorn sur le socket hérité.
+
+    `reload_version()` donne la version à charger à la réception de SIGHUP (None : la plus récente).
+    """
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    if hasattr(signal, "SIGHUP"):
+        # Pendant un rechargement, la demande est mise en attente puis rejouée (jamais ignorée)
+        signal.signal(signal.SIGHUP, lambda *_: app_module.start_reload(reload_version(), queue=True))
+    # Sinon tous les workers tireraient les mêmes échantillons de logs
+    random.seed()
+
+    config = uvicorn.Config(app_module.app, log_level=log_level, timeout_graceful_shutdown=graceful_timeout)
+    # uvicorn gère SIGINT / SIGTERM : il termine les requêtes en cours puis lance les événements shutdown
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+class Supervisor:
+    """Crée les workers, relance ceux qui meurent et propage les signaux."""
+
+    def __init__(self, app_module, sock: socket.socket, workers: int, log_level: str, graceful_timeout: float):
+        self.app_module = app_module
+        self.sock = sock
+        self.n_workers = workers
+        self.log_level = log_level
+        self.graceful_timeout = graceful_timeout
+        self.children = set()
+        self.stopping = False
+        # Version demandée par /api/admin/reload, partagée avec les workers (créée avant le fork)
+        self.reload_version = multiprocessing.Array("c", RELOAD_VERSION_BYTES)
+
+    def spawn(self) -> None:
+        pid = os.fork()
+        if pid == 0:
+            # Groupe de processus propre : un Ctrl+C n'atteint que le parent, qui arrête les workers une seule fois
+            os.setpgid(0, 0)
+            signal.signal(signal.SIGUSR1, signal.SIG_IGN)  # relais réservé au parent
+            self.app_module.cluster_reload = self.request_reload
+            code = 0
+            try:
+                run_worker(self.app_module, self.sock, self.log_level, self.graceful_timeout,
+                           reload_version=self.requested_version)
+            except BaseException:
+                code = 1
+                import traceback
+                traceback.print_exc()
+            finally:
+                os._exit(code)
+        self.children.add(pid)
+
+    def requested_version(self):
+        return self.reload_version.value.decode() or None
+
+    def request_reload(self, version) -> None:
+        """Côté worker (/api/admin/reload) : publie la version puis demande au parent de relayer SIGHUP."""
+        encoded = (version or "").encode()
+        if len(encoded) >= RELOAD_VERSION_BYTES:
+            raise ValueError(f"Nom de version trop long (max {RELOAD_VERSION_BYTES - 1} octets).")
+        self.reload_version.value = encoded
+        os.kill(os.getppid(), signal.SIGUSR1)
+
+    def reload_all(self, *_) -> None:
+        """SIGHUP reçu par le parent (kill -HUP) : dernière version du registre dans chaque worker."""
+        self.reload_version.value = b""
+        self.signal_children(signal.SIGHUP)
+
+    def signal_children(self, sig: int) -> None:
+        for pid in list(self.children):
+            try:
+                os.kill(pid, sig)
+            except ProcessLookupError:
+                self.children.discard(pid)
+
+    def reap(self) -> list:
+        """Processus fils terminés depuis le dernier appel."""
+        dead = []
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                self.children.clear()
+                break
+            if pid == 0:
+                break
+            self.children.discard(pid)
+            dead.append((pid, status))
+        return dead
+
+    def stop(self, *_) -> None:
+        self.stopping = True
+
+    def run(self) -> None:
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGHUP, self.reload_all)
+        # Relais de /api/admin/reload : la version est déjà publiée par le worker demandeur
+        signal.signal(signal.SIGUSR1, lambda *_: self.signal_children(signal.SIGHUP))
+
+        # Objets du parent exclus du ramasse-miettes : les fils ne réécrivent pas leurs pages
+        gc.collect()
+        gc.freeze()
+        for _ in range(self.n_workers):
+            self.spawn()
+        print(f"✅ {self.n_workers} workers démarrés (pids : {sorted(self.children)})")
+
+        while not self.stopping:
+            time.sleep(0.5)
+            for pid, status in self.reap():
+                if not self.stopping:
+                    print(f"⚠️ Worker {pid} arrêté (statut {status}) : relance")
+                    self.spawn()
+
+        print("🛑 Arrêt des workers (requêtes en cours terminées)...")
+        self.signal_children(signal.SIGTERM)
+        deadline = time.monotonic() + self.graceful_timeout
+        while self.children and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.1)
+        if self.children:
+            print(f"⚠️ Workers encore actifs après {self.graceful_timeout:.0f} s : arrêt forcé")
+            self.signal_children(signal.SIGKILL)
+            while self.children:
+                self.reap()
+                time.sleep(0.05)
+        self.sock.close()
+        print("✅ Serveur arrêté")
+
+
+# ==========================================
+# 🌐 TUNNEL NGROK (OPTIONNEL)
+# ==========================================
+def open_tunnel(port: int) -> str:
+    from pyngrok import conf, ngrok
+
+    token = os.environ.get("NGROK_AUTHTOKEN")
+    if token:
+        conf.get_default().authtoken = token
+    public_url = ngrok.connect(port, bind_tls=True).public_url
+    print("\n==============================================")
+    print(f"🌐 URL publique     : {public_url}")
+    print(f"📘 Docs Swagger     : {public_url}/api/docs")
+    print(f"🧠 Endpoint API     : {public_url}/api/predict")
+    print("==============================================\n")
+    return public_url
+
+
+# ==========================================
+# ▶️ POINT D'ENTRÉE
+# ==========================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lance l'API avec plusieurs workers partageant le modèle.")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--graceful-timeout", type=float, default=GRACEFUL_TIMEOUT_S,
+                        help="secondes laissées aux requêtes en cours à l'arrêt")
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument("--ngrok", action="store_true", help="ouvre un tunnel ngrok public")
+    parser.add_argument("--open-browser", action="store_true", help="ouvre le front dans le navigateur")
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers doit être >= 1")
+
+    print("🚀 Chargement du modèle...")
+    import app as app_module  # modèle, vectoriseur et index chargés ici, une seule fois
+
+    sock = bind_socket(args.host, args.port)
+    local_url = f"http://{'localhost' if args.host in ('0.0.0.0', '::') else args.host}:{args.port}"
+    print(f"🧠 API locale : {local_url}/api/predict")
+
+    public_url = open_tunnel(args.port) if args.ngrok else None
+    if args.open_browser:
+        webbrowser.open(f"{public_url or local_url}/")
+
+    try:
+        if args.workers == 1 or not hasattr(os, "fork"):
+            if args.workers > 1:
+                print("⚠️ fork indisponible sur cette plateforme : un seul worker")
+            run_worker(app_module, sock, args.log_level, args.graceful_timeout)
+        else:
+            Supervisor(app_module, sock, args.workers, args.log_level, args.graceful_timeout).run()
+    finally:
+        if public_url is not None:
+            from pyngrok import ngrok
+            print("🛑 Fermeture du tunnel Ngrok...")
+            ngrok.kill()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,246 @@
+import argparse
+import json
+import os
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from src.feature_cache import ProfessorFeatureCache
+from src.metrics import NO_TIMER
+from src.model_registry import MODEL_TIERS, REGISTRY_DIR, ModelRegistry, resolve_model
+from src.parallel import ordered_map
+from src.schemas import ndjson_line, parse_prediction_line
+
+# === CONFIGURATION ===
+# Mêmes artefacts que l'API (app.py) quand le registre n'a pas de version du niveau demandé
+MODEL_PATH = Path("models/model_contextual_randomforest.pkl")
+COMPACT_MODEL_PATH = Path("models/model_contextual_compact.pkl")
+TIER_PATHS = {"full": MODEL_PATH, "compact": COMPACT_MODEL_PATH}
+CHUNK_SIZE = 1000  # lignes par tâche du pool
+CHECKPOINT_EVERY = 10  # blocs entre deux sauvegardes de l'avancement
+PROFESSOR_CACHE_SIZE = 2048
+
+
+# ==========================
+# 🔹 NOTATION D'UN BLOC (POOL DE PROCESSUS)
+# ==========================
+
+_model = None
+_professor_cache = None
+
+
+def _init_worker(model) -> None:
+    """Modèle transmis une fois par processus (hérité en copie sur écriture avec fork)."""
+    global _model, _professor_cache
+    warnings.filterwarnings("ignore", message="X does not have valid feature names")
+    _model = model
+    _professor_cache = ProfessorFeatureCache(maxsize=PROFESSOR_CACHE_SIZE)
+
+
+def _professor_features(professor: dict, timer=NO_TIMER) -> dict:
+    # Un catalogue répète les mêmes professeurs : features mises en cache comme dans l'API
+    return _professor_cache.get_or_compute(professor, lambda p: _model.features.professor_features(p, timer))
+
+
+def _score_chunk(chunk: tuple) -> tuple:
+    """Bloc `(lignes [(numéro, octets)], offset de fin, dernière ligne)` -> sortie NDJSON et compteurs.
+
+    Même calcul que /api/predict : validation PredictionRequest, features du transformeur
+    du modèle, note arrondie à 2 décimales. Une ligne invalide donne `{"line": n, "error": ...}`.
+    """
+    lines, offset, line_no = chunk
+    parsed = [(n, *parse_prediction_line(line)) for n, line in lines]
+    records = [record for _, record, _ in parsed if record is not None]
+    scores = iter(())
+    if records:
+        X = _model.features.transform(records, _professor_features)
+        scores = iter(_model.predict(X))
+    out = b"".join(
+        ndjson_line({"line": n, "error": error}) if record is None
+        else ndjson_line({"gradeAverage": round(float(next(scores)), 2)})
+        for n, record, error in parsed
+    )
+    return out, len(records), len(parsed) - len(records), offset, line_no
+
+
+def iter_chunks(path: Path, offset: int, line_no: int, chunk_size: int):
+    """Blocs de lignes non vides lus à partir de l'octet `offset` (ligne `line_no` déjà lue)."""
+    with open(path, "rb") as f:
+        f.seek(offset)
+        chunk = []
+        for line in f:
+            line_no += 1
+            offset += len(line)
+            if line.strip():
+                chunk.append((line_no, line))
+            if len(chunk) >= chunk_size:
+                yield chunk, offset, line_no
+                chunk = []
+        if chunk:
+            yield chunk, offset, line_no
+
+
+# ==========================
+# 🔹 POINT DE REPRISE
+# ==========================
+
+class Checkpoint:
+    """Avancement d'une notation : position dans l'entrée, taille de la sortie, compteurs.
+
+    La sortie est en ajout seul : au démarrage elle est tronquée à la taille enregistrée, ce qui
+    écarte les lignes écrites après la dernière sauvegarde (comme src/data_cleaning.py).
+    Un point de reprise d'une autre entrée ou d'un autre modèle (version, ou artefact réécrit :
+    taille et date de modification) est ignoré.
+    """
+
+    def __init__(self, path: Path, config: dict):
+        self.path = Path(path)
+        self.config = config
+        self.input_offset = 0
+        self.lines_read = 0
+        self.output_bytes = 0
+        self.scored = 0
+        self.errors = 0
+
+    def load(self) -> bool:
+        if not self.path.exists():
+            return False
+        with open(self.path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("config") != self.config:
+            return False
+        for name in ("input_offset", "lines_read", "output_bytes", "scored", "errors"):
+            setattr(self, name, data[name])
+        return True
+
+    def save(self) -> None:
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"config": self.config, **self.state()}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def state(self) -> dict:
+        return {
+            "input_offset": self.input_offset,
+            "lines_read": self.lines_read,
+            "output_bytes": self.output_bytes,
+            "scored": self.scored,
+            "errors": self.errors,
+        }
+
+
+def checkpoint_config(input_path: Path, model) -> dict:
+    """Clé du point de reprise : entrée et identité du modèle, artefact compris.
+
+    Un artefact historique réécrit sur place (réentraînement) garde la version "legacy-<niveau>" :
+    sa taille et sa date de modification le distinguent.
+    """
+    stat = os.stat(model.source)
+    return {
+        "input": str(Path(input_path).resolve()),
+        "model_version": model.version,
+        "model_source": model.source,
+        "model_bytes": stat.st_size,
+        "model_mtime_ns": stat.st_mtime_ns,
+    }
+
+
+def checkpoint_path(out_path: Path) -> Path:
+    return Path(out_path).with_name(Path(out_path).name + ".checkpoint.json")
+
+
+def _save(checkpoint: Checkpoint, out) -> None:
+    # La sortie est sur disque avant le point de reprise qui y fait référence
+    out.flush()
+    os.fsync(out.fileno())
+    checkpoint.output_bytes = out.tell()
+    checkpoint.save()
+
+
+# ==========================
+# 🔹 NOTATION D'UN FICHIER
+# ==========================
+
+def score_file(model, input_path: Path, out_path: Path, n_jobs: int = 1, chunk_size: int = CHUNK_SIZE,
+               restart: bool = False) -> dict:
+    """Note un JSONL de PredictionRequest dans `out_path` (une ligne par ligne non vide, même ordre).
+
+    Reprend au dernier point de reprise sauf `restart` ; relancée sur un fichier complété,
+    ne note que les lignes ajoutées depuis. Renvoie les compteurs cumulés.
+    """
+    input_path, out_path = Path(input_path), Path(out_path)
+    config = checkpoint_config(input_path, model)
+    checkpoint = Checkpoint(checkpoint_path(out_path), config)
+    resumed = not restart and checkpoint.load()
+    if not resumed:
+        checkpoint = Checkpoint(checkpoint.path, config)  # état vide : la sortie sera tronquée à 0
+    elif checkpoint.lines_read:
+        print(f"↩️ Reprise après la ligne {checkpoint.lines_read} ({checkpoint.scored} notées)")
+
+    chunks = iter_chunks(input_path, checkpoint.input_offset, checkpoint.lines_read, chunk_size)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    out = open(out_path, "a+b")
+    out.truncate(checkpoint.output_bytes)
+    out.seek(checkpoint.output_bytes)
+    pool = None
+    started, scored_before = time.perf_counter(), checkpoint.scored
+    try:
+        if n_jobs > 1:
+            pool = ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker, initargs=(model,))
+            results = ordered_map(pool, _score_chunk, chunks, max_in_flight=2 * n_jobs)
+        else:
+            _init_worker(model)
+            results = map(_score_chunk, chunks)
+
+        for i, (blob, n_scored, n_errors, offset, line_no) in enumerate(results, start=1):
+            out.write(blob)
+            checkpoint.input_offset, checkpoint.lines_read = offset, line_no
+            checkpoint.scored += n_scored
+            checkpoint.errors += n_errors
+            if i % CHECKPOINT_EVERY == 0:
+                _save(checkpoint, out)
+                rate = (checkpoint.scored - scored_before) / (time.perf_counter() - started)
+                print(f"⏳ {checkpoint.lines_read} lignes lues, {checkpoint.scored} notées ({rate:.0f}/s)")
+    finally:
+        # Arrêt (Ctrl+C, erreur) : l'avancement des blocs déjà écrits est conservé
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+        _save(checkpoint, out)
+        out.close()
+    return checkpoint.state()
+
+
+# === LIGNE DE COMMANDE ===
+def main():
+    parser = argparse.ArgumentParser(description="Note hors ligne un JSONL de paires professeur/cours (comme /api/predict).")
+    parser.add_argument("input", type=Path, help="JSONL : une PredictionRequest par ligne")
+    parser.add_argument("out", type=Path, help="JSONL des notes, dans l'ordre de l'entrée")
+    parser.add_argument("--jobs", type=int, default=1, help="processus de notation")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--restart", action="store_true", help="ignore le point de reprise et repart de zéro")
+    parser.add_argument("--tier", choices=MODEL_TIERS, default=os.environ.get("MODEL_TIER", "full"))
+    parser.add_argument("--version", default=None, help="version du registre (défaut : la plus récente du niveau)")
+    parser.add_argument("--registry", type=Path, default=Path(os.environ.get("MODEL_REGISTRY_DIR", str(REGISTRY_DIR))))
+    parser.add_argument("--model", type=Path, default=None, help="artefact hors registre (défaut : celui de l'API)")
+    args = parser.parse_args()
+    if args.jobs < 1 or args.chunk_size < 1:
+        parser.error("--jobs et --chunk-size doivent être >= 1")
+    warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+    if args.model is not None:
+        args.version = "legacy"
+    model = resolve_model(ModelRegistry(args.registry), args.tier, args.model or TIER_PATHS[args.tier],
+                          args.version)
+    print(f"✅ Modèle {model.version} ({model.tier}) chargé depuis {model.source}")
+
+    print(f"🧮 Notation de {args.input} -> {args.out} ({args.jobs} processus, blocs de {args.chunk_size})")
+    t0 = time.perf_counter()
+    stats = score_file(model, args.input, args.out, n_jobs=args.jobs, chunk_size=args.chunk_size,
+                       restart=args.restart)
+    print(f"✅ {stats['scored']} notées, {stats['errors']} lignes invalides en {time.perf_counter() - t0:.1f} s")
+    print(f"📦 Notes : {args.out} (reprise : {checkpoint_path(args.out)})")
+
+
+if __name__ == "__main__":
+    main()
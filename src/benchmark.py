@@ -0,0 +1,358 @@
+import argparse
+import json
+import multiprocessing
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+from src.data_loader import iter_professors, normalize_professor, sample_courses
+from src.smart_predictor import (
+    build_profile_text,
+    compute_degree_score,
+    compute_prestige_score,
+    compute_similarity,
+    extract_domain_from_text,
+    fit_vectorizer,
+    get_vectorizer,
+    set_vectorizer,
+)
+
+# === CONFIGURATION ===
+DATA_PATH = Path("data/data_train.json")
+TRAINING_DATA_PATH = Path("data/data_train_test.json")
+RESULTS_DIR = Path("benchmarks")  # un rapport par commit : benchmarks/<commit>.json
+TEXT_SIZES = (10, 100, 1000, 10000)  # mots par texte
+LIST_SIZES = (1, 10, 100)  # diplômes / expériences par professeur
+API_BATCH_SIZES = (1, 10, 100, 1000)
+TRAINING_SIZES = (100, 10_000, 100_000)  # professeurs simulés
+GROUPS = ("features", "api", "training")
+
+
+# ==========================
+# 🔹 MESURES
+# ==========================
+
+def measure(fn, repeat: int, rows: int = 1, setup=None, warmup: int = 1) -> dict:
+    """Latences de `repeat` appels à `fn` puis pic mémoire (tracemalloc) d'un appel supplémentaire.
+
+    `setup` (non chronométré) est appelé avant chaque exécution ; `rows` = lignes traitées par appel.
+    """
+    for _ in range(warmup):
+        if setup:
+            setup()
+        fn()
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+
+    # Mesure mémoire à part : tracemalloc ralentit l'exécution et fausserait les latences
+    if setup:
+        setup()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return summarize(times, rows, peak, "tracemalloc")
+
+
+def summarize(times: list, rows: int, peak_bytes: int, mem_method: str) -> dict:
+    times = np.asarray(times, dtype=float)
+    p50 = float(np.percentile(times, 50))
+    return {
+        "runs": int(times.size),
+        "p50_ms": round(p50 * 1000, 4),
+        "p99_ms": round(float(np.percentile(times, 99)) * 1000, 4),
+        "mean_ms": round(float(times.mean()) * 1000, 4),
+        "rows_per_s": round(rows / p50, 1) if p50 > 0 else None,
+        "peak_mem_mb": round(peak_bytes / 2**20, 3),
+        "mem_method": mem_method,
+    }
+
+
+def max_rss_bytes() -> int:
+    # ru_maxrss : kilo-octets sous Linux, octets sous macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+# ==========================
+# 🔹 DONNÉES DE TEST
+# ==========================
+
+def load_records(path: Path) -> list:
+    return list(iter_professors(path))
+
+
+def make_text(words: list, n_words: int, rng: np.random.Generator) -> str:
+    return " ".join(rng.choice(words, size=n_words))
+
+
+def cycle_records(records: list, n: int) -> list:
+    """`n` professeurs obtenus en répétant le dataset, chacun avec un identifiant propre."""
+    return [{**records[i % len(records)], "professorId": f"bench-{i}"} for i in range(n)]
+
+
+# ==========================
+# 🔹 EXTRACTEURS DE FEATURES
+# ==========================
+
+def bench_features(records: list, repeat: int) -> list:
+    rng = np.random.default_rng(0)
+    corpus = [build_profile_text(r) for r in records]
+    words = " ".join(corpus).split()
+    diplomas = [d for r in records for d in r.get("diplomas") or []]
+    experiences = [e for r in records for e in r.get("experiences") or []]
+    results = []
+
+    previous = get_vectorizer()
+    fitted = fit_vectorizer(corpus)
+    try:
+        for n_words in TEXT_SIZES:
+            text_a, text_b = make_text(words, n_words, rng), make_text(words, n_words, rng)
+            n_runs = max(5, repeat // max(1, n_words // 100))
+            # Sans vectoriseur : ajustement par paire (repli historique) ; avec : transformation seule
+            for mode, vectorizer in (("per-pair", None), ("fitted", fitted)):
+                set_vectorizer(vectorizer)
+                results.append({
+                    "name": "compute_similarity",
+                    "params": {"words": n_words, "vectorizer": mode},
+                    **measure(lambda: compute_similarity(text_a, text_b), n_runs),
+                })
+            results.append({
+                "name": "extract_domain_from_text",
+                "params": {"words": n_words},
+                **measure(lambda: extract_domain_from_text(text_a), n_runs),
+            })
+    finally:
+        set_vectorizer(previous)
+
+    for n_items in LIST_SIZES:
+        sample_d = [diplomas[i] for i in rng.integers(0, len(diplomas), n_items)]
+        sample_e = [experiences[i] for i in rng.integers(0, len(experiences), n_items)]
+        results.append({
+            "name": "compute_degree_score",
+            "params": {"diplomas": n_items},
+            **measure(lambda: compute_degree_score(sample_d), repeat),
+        })
+        results.append({
+            "name": "compute_prestige_score",
+            "params": {"experiences": n_items},
+            **measure(lambda: compute_prestige_score(sample_e), repeat),
+        })
+    return results
+
+
+# ==========================
+# 🔹 API DE BOUT EN BOUT
+# ==========================
+
+def bench_api(records: list, repeat: int, batch_sizes) -> list:
+    """`/api/predict` (lot de 1) puis `/api/predict/batch`, via le TestClient de FastAPI."""
+    from fastapi.testclient import TestClient
+    import app as app_module
+
+    if app_module.serving is None:
+        print("⚠️ Modèle non chargé : benchmark de l'API ignoré")
+        return []
+
+    professors = [normalize_professor(r) for r in records]
+    courses = sample_courses(records)
+    results = []
+
+    def clear_caches():
+        app_module.professor_cache.clear()
+        app_module.prediction_cache.clear()
+
+    with TestClient(app_module.app) as client:
+        for size in batch_sizes:
+            items = [
+                {"professor": professors[i % len(professors)], "course": courses[(7 * i) % len(courses)]}
+                for i in range(size)
+            ]
+            if size == 1:
+                route, payload = "/api/predict", items[0]
+            else:
+                route, payload = "/api/predict/batch", {"items": items}
+
+            def call():
+                response = client.post(route, json=payload)
+                if response.status_code != 200:
+                    raise RuntimeError(f"{route} : HTTP {response.status_code} {response.text}")
+
+            results.append({
+                "name": "api_predict",
+                # Caches des features professeur et des résultats vidés avant chaque appel : coût à froid
+                "params": {"route": route, "batch_size": size, "professor_cache": "cold", "prediction_cache": "cold",
+                           "model_version": app_module.serving.version},
+                **measure(call, max(5, repeat // max(1, size // 10)), rows=size,
+                          setup=clear_caches),
+            })
+    return results
+
+
+# ==========================
+# 🔹 GÉNÉRATION + ENTRAÎNEMENT
+# ==========================
+
+def _training_case(n_professors: int, n_jobs: int, n_estimators: int, seed: int) -> dict:
+    """Exécuté dans un processus neuf : le pic RSS mesuré ne concerne que ce cas."""
+    from src.model_training_contextual import build_model, simulate_course_pairings
+
+    records = cycle_records(load_records(TRAINING_DATA_PATH), n_professors)
+    set_vectorizer(fit_vectorizer(build_profile_text(p) for p in iter_professors(DATA_PATH)))
+    rss0 = max_rss_bytes()
+
+    t0 = time.perf_counter()
+    df = simulate_course_pairings(records, n_jobs=n_jobs, seed=seed)
+    simulate_s = time.perf_counter() - t0
+    rss_simulate = max_rss_bytes()
+
+    X, y = df.drop(columns=["target", "professorId"]), df["target"]
+    t0 = time.perf_counter()
+    build_model(n_estimators=n_estimators).fit(X, y)
+    fit_s = time.perf_counter() - t0
+    return {
+        "rows": len(df),
+        "simulate_s": simulate_s,
+        "fit_s": fit_s,
+        "simulate_peak": rss_simulate - rss0,
+        "fit_peak": max_rss_bytes() - rss0,
+    }
+
+
+def bench_training(sizes, repeat: int, n_jobs: int, n_estimators: int) -> list:
+    runs = {n: [] for n in sizes}
+    ctx = multiprocessing.get_context("spawn")
+    for n_professors in sizes:
+        for i in range(repeat):
+            with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+                runs[n_professors].append(pool.submit(_training_case, n_professors, n_jobs, n_estimators, i).result())
+            print(f"⏱️ Entraînement {n_professors} professeurs : run {i + 1}/{repeat}")
+
+    results = []
+    for n_professors, cases in runs.items():
+        rows = cases[0]["rows"]
+        params = {"professors": n_professors, "jobs": n_jobs}
+        results.append({
+            "name": "simulate_course_pairings",
+            "params": params,
+            **summarize([c["simulate_s"] for c in cases], rows, max(c["simulate_peak"] for c in cases), "rss"),
+        })
+        results.append({
+            "name": "model_fit",
+            "params": {**params, "n_estimators": n_estimators},
+            **summarize([c["fit_s"] for c in cases], rows, max(c["fit_peak"] for c in cases), "rss"),
+        })
+    return results
+
+
+# ==========================
+# 🔹 RAPPORT
+# ==========================
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "sklearn": sklearn.__version__,
+        "platform": platform.platform(),
+        "cpu_count": multiprocessing.cpu_count(),
+    }
+
+
+def result_key(result: dict) -> str:
+    return f"{result['name']} {json.dumps(result['params'], sort_keys=True, ensure_ascii=False)}"
+
+
+def compare(results: list, baseline: dict) -> None:
+    """Affiche l'évolution du p50 par rapport à un rapport précédent (mêmes noms et paramètres)."""
+    previous = {result_key(r): r for r in baseline.get("results", [])}
+    print(f"\n📊 Comparaison avec {baseline.get('environment', {}).get('commit')} (p50) :")
+    for result in results:
+        old = previous.get(result_key(result))
+        if old is None or not old["p50_ms"]:
+            continue
+        ratio = result["p50_ms"] / old["p50_ms"]
+        print(f"  {result_key(result)} : {old['p50_ms']:.3f} -> {result['p50_ms']:.3f} ms (x{ratio:.2f})")
+
+
+# === LIGNE DE COMMANDE ===
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks des extracteurs de features, de l'API et de l'entraînement.")
+    parser.add_argument("--only", default=",".join(GROUPS), help=f"groupes à exécuter parmi {','.join(GROUPS)}")
+    parser.add_argument("--out", type=Path, default=None, help="défaut : benchmarks/<commit>.json")
+    parser.add_argument("--repeat", type=int, default=200, help="répétitions des mesures courtes")
+    parser.add_argument("--training-repeat", type=int, default=1)
+    parser.add_argument("--training-sizes", default=",".join(map(str, TRAINING_SIZES)))
+    parser.add_argument("--jobs", type=int, default=1, help="processus pour la génération synthétique")
+    parser.add_argument("--fit-estimators", type=int, default=400, help="arbres du modèle entraîné")
+    parser.add_argument("--quick", action="store_true", help="tailles et répétitions réduites (vérification rapide)")
+    parser.add_argument("--baseline", type=Path, default=None, help="rapport JSON précédent à comparer")
+    args = parser.parse_args()
+
+    groups = {g.strip() for g in args.only.split(",") if g.strip()}
+    unknown = groups - set(GROUPS)
+    if unknown:
+        parser.error(f"groupes inconnus : {sorted(unknown)}")
+    training_sizes = [int(n) for n in args.training_sizes.split(",")]
+    api_sizes = API_BATCH_SIZES
+    if args.quick:
+        args.repeat = min(args.repeat, 20)
+        training_sizes = [n for n in training_sizes if n <= 1000] or [100]
+        api_sizes = API_BATCH_SIZES[:3]
+
+    records = load_records(DATA_PATH)
+    results = []
+    if "features" in groups:
+        print("⏱️ Extracteurs de features...")
+        results += bench_features(records, args.repeat)
+    if "api" in groups:
+        print("⏱️ API /api/predict...")
+        results += bench_api(records, args.repeat, api_sizes)
+    if "training" in groups:
+        print("⏱️ Génération synthétique + entraînement...")
+        results += bench_training(training_sizes, args.training_repeat, args.jobs, args.fit_estimators)
+
+    for result in results:
+        print(f"  {result_key(result)} : p50={result['p50_ms']:.3f} ms, p99={result['p99_ms']:.3f} ms, "
+              f"{result['rows_per_s']} lignes/s, {result['peak_mem_mb']} Mo")
+
+    report = {"environment": environment(), "results": results}
+    if args.out is None:
+        args.out = RESULTS_DIR / f"{report['environment']['commit'] or 'local'}.json"
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"📦 Résultats sauvegardés dans : {args.out}")
+
+    if args.baseline is not None:
+        with open(args.baseline, encoding="utf-8") as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from pydantic import ValidationError
+
+from src.data_loader import iter_professor_chunks, normalize_professor
+from src.feature_cache import payload_hash
+from src.parallel import ordered_map
+from src.schemas import Professor
+
+# === CONFIGURATION ===
+RAW_PATHS = [Path("data/data_train.json")]
+OUT_DIR = Path("data/cleaned")
+CLEANED_FILE = "professors.jsonl"
+REJECTED_FILE = "rejected.jsonl"
+MANIFEST_FILE = "manifest.json"
+CHUNK_SIZE = 500
+CHECKPOINT_EVERY = 20  # blocs entre deux sauvegardes du manifeste
+# Version des règles de nettoyage : à incrémenter à chaque changement (tout est alors renettoyé)
+CLEANING_VERSION = 1
+
+
+# ==========================
+# 🔹 NORMALISATION D'UN ENREGISTREMENT
+# ==========================
+
+def _collapse(value):
+    """Espaces superflus retirés dans toutes les chaînes (récursif)."""
+    if isinstance(value, str):
+        return " ".join(value.split())
+    if isinstance(value, dict):
+        return {k: _collapse(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_collapse(v) for v in value]
+    return value
+
+
+def _first(mapping: dict, *keys):
+    for key in keys:
+        value = mapping.get(key)
+        if value not in (None, ""):
+            return value
+    return None
+
+
+def normalize_record(raw: dict) -> dict:
+    """Enregistrement brut -> professeur au format de l'API + `professorId`.
+
+    Repris des variantes rencontrées dans les exports : `firstname`/`fistname`,
+    `professor_id`/`professorId`, `course_description`, dates d'expérience sans `duration`,
+    listes absentes ou nulles (dont `pastCourses`).
+    """
+    raw = _collapse(raw)
+    record = dict(raw)
+    record["fistname"] = _first(raw, "fistname", "firstname", "firstName", "first_name")
+    record["pastCourses"] = [
+        {**c, "description": _first(c, "description", "course_description")}
+        for c in raw.get("pastCourses") or []
+    ]
+    experiences = []
+    for e in raw.get("experiences") or []:
+        duration = _first(e, "duration", "years", "dates")
+        start, end = _first(e, "startDate", "start_date"), _first(e, "endDate", "end_date")
+        if duration is None and start is not None:
+            duration = f"{start} - {end or ''}".strip(" -")
+        experiences.append({**e, "duration": duration})
+    record["experiences"] = experiences
+
+    professor = normalize_professor(record)
+    professor_id = _first(raw, "professorId", "professor_id", "id")
+    professor["professorId"] = str(professor_id) if professor_id is not None else None
+    return professor
+
+
+def content_hash(professor: dict) -> str:
+    """Empreinte du contenu (hors identifiant) : deux exports du même profil ont la même."""
+    return payload_hash({k: v for k, v in professor.items() if k != "professorId"}, collapse_whitespace=True)
+
+
+def clean_record(raw: dict):
+    """Renvoie `(professeur, None)` si l'enregistrement est valide, sinon `(None, erreurs)`."""
+    if not isinstance(raw, dict):
+        return None, [f"enregistrement de type {type(raw).__name__}"]
+    try:
+        professor = normalize_record(raw)
+        Professor(**professor)  # même validation que /api/predict
+    except ValidationError as e:
+        return None, [f"{'.'.join(map(str, err['loc']))} : {err['msg']}" for err in e.errors()]
+    except (TypeError, ValueError, AttributeError) as e:
+        return None, [str(e)]
+    if professor["professorId"] is None:
+        professor["professorId"] = content_hash(professor)[:16]
+    return professor, None
+
+
+# ==========================
+# 🔹 TRAITEMENT PAR BLOCS (POOL DE PROCESSUS)
+# ==========================
+
+_seen = frozenset()
+
+
+def _init_worker(seen) -> None:
+    global _seen
+    _seen = seen
+
+
+def _clean_chunk(records: list) -> list:
+    """[(hash brut, hash du contenu | None, professeur | None, erreurs | None)] des enregistrements nouveaux."""
+    results = []
+    for raw in records:
+        raw_hash = payload_hash(raw, collapse_whitespace=True)
+        if raw_hash in _seen:
+            continue
+        professor, errors = clean_record(raw)
+        results.append((raw_hash, content_hash(professor) if professor else None, professor, errors))
+    return results
+
+
+# ==========================
+# 🔹 MANIFESTE ET SORTIES
+# ==========================
+
+def config_hash() -> str:
+    """Version des règles + schéma de l'API : si l'un change, le nettoyage repart de zéro."""
+    schema = getattr(Professor, "model_json_schema", Professor.schema)()
+    config = {"version": CLEANING_VERSION, "schema": schema}
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class Manifest:
+    """Enregistrements déjà traités (hash brut -> hash du contenu, "" si rejeté) et taille des sorties.
+
+    Les sorties sont en ajout seul : au démarrage elles sont tronquées à la taille enregistrée,
+    ce qui écarte les lignes écrites après la dernière sauvegarde (arrêt brutal).
+    """
+
+    def __init__(self, out_dir: Path):
+        self.out_dir = Path(out_dir)
+        self.path = self.out_dir / MANIFEST_FILE
+        self.config = config_hash()
+        self.records = {}
+        self.sizes = {CLEANED_FILE: 0, REJECTED_FILE: 0}
+
+    def load(self) -> bool:
+        """Charge le manifeste ; False (état vide) s'il est absent ou d'une autre configuration."""
+        if not self.path.exists():
+            return False
+        with open(self.path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("config") != self.config:
+            return False
+        self.records = data["records"]
+        self.sizes.update(data["sizes"])
+        return True
+
+    def save(self) -> None:
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"config": self.config, "sizes": self.sizes, "records": self.records}, f)
+        os.replace(tmp_path, self.path)
+
+    def open_outputs(self) -> dict:
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        files = {}
+        for name, size in self.sizes.items():
+            path = self.out_dir / name
+            f = open(path, "a+b")
+            f.truncate(size)
+            f.seek(size)
+            files[name] = f
+        return files
+
+
+def clean_files(paths, out_dir: Path = OUT_DIR, n_jobs: int = 1, chunk_size: int = CHUNK_SIZE,
+                full: bool = False) -> dict:
+    """Nettoie les fichiers bruts (JSON ou JSONL) en un JSONL dédupliqué ; renvoie les compteurs du passage."""
+    manifest = Manifest(out_dir)
+    if full or not manifest.load():
+        manifest = Manifest(out_dir)  # état vide : les sorties seront tronquées à 0
+    seen = frozenset(manifest.records)
+    contents = {h for h in manifest.records.values() if h}
+    stats = {"read": 0, "skipped": 0, "written": 0, "duplicates": 0, "rejected": 0}
+
+    def chunks():
+        for path in paths:
+            for chunk in iter_professor_chunks(path, chunk_size):
+                stats["read"] += len(chunk)
+                yield chunk
+
+    files = manifest.open_outputs()
+    pool = None
+    try:
+        if n_jobs > 1:
+            pool = ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker, initargs=(seen,))
+            results = ordered_map(pool, _clean_chunk, chunks(), max_in_flight=2 * n_jobs)
+        else:
+            _init_worker(seen)
+            results = map(_clean_chunk, chunks())
+
+        for i, chunk_results in enumerate(results, start=1):
+            for raw_hash, digest, professor, errors in chunk_results:
+                if raw_hash in manifest.records:
+                    stats["duplicates"] += 1  # doublon exact au sein de ce passage
+                    continue
+                if professor is None:
+                    line = {"raw_hash": raw_hash, "errors": errors}
+                    files[REJECTED_FILE].write((json.dumps(line, ensure_ascii=False) + "\n").encode("utf-8"))
+                    stats["rejected"] += 1
+                    manifest.records[raw_hash] = ""
+                    continue
+                if digest in contents:
+                    stats["duplicates"] += 1
+                else:
+                    contents.add(digest)
+                    files[CLEANED_FILE].write((json.dumps(professor, ensure_ascii=False) + "\n").encode("utf-8"))
+                    stats["written"] += 1
+                manifest.records[raw_hash] = digest
+
+            if i % CHECKPOINT_EVERY == 0:
+                _checkpoint(manifest, files)
+        _checkpoint(manifest, files)
+    finally:
+        # Arrêt (Ctrl+C, erreur) : workers arrêtés et blocs en attente annulés, comme src/batch_scoring.py
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+        for f in files.values():
+            f.close()
+
+    stats["skipped"] = stats["read"] - stats["written"] - stats["duplicates"] - stats["rejected"]
+    return stats
+
+
+def _checkpoint(manifest: Manifest, files: dict) -> None:
+    # Les sorties sont sur disque avant le manifeste qui y fait référence
+    for name, f in files.items():
+        f.flush()
+        os.fsync(f.fileno())
+        manifest.sizes[name] = f.tell()
+    manifest.save()
+
+
+# === LIGNE DE COMMANDE ===
+def main():
+    parser = argparse.ArgumentParser(description="Nettoie les exports de professeurs en un JSONL d'entraînement.")
+    parser.add_argument("inputs", nargs="*", type=Path, default=RAW_PATHS, help="fichiers JSON ou JSONL bruts")
+    parser.add_argument("--out-dir", type=Path, default=OUT_DIR)
+    parser.add_argument("--jobs", type=int, default=1, help="processus de nettoyage")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--full", action="store_true", help="ignore le manifeste et renettoie tout")
+    args = parser.parse_args()
+
+    print(f"🧹 Nettoyage de {len(args.inputs)} fichier(s) -> {args.out_dir / CLEANED_FILE}")
+    stats = clean_files(args.inputs, args.out_dir, n_jobs=args.jobs, chunk_size=args.chunk_size, full=args.full)
+    print(f"✅ {stats['read']} lus : {stats['written']} écrits, {stats['duplicates']} doublons, "
+          f"{stats['rejected']} rejetés, {stats['skipped']} déjà nettoyés")
+    if stats["rejected"]:
+        print(f"⚠️ Détail des rejets : {args.out_dir / REJECTED_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+import json
+from pathlib import Path
+
+# Taille des lectures disque (caractères)
+READ_SIZE = 1 << 16
+
+
+# ==========================
+# 🔹 LECTURE EN FLUX DES PROFESSEURS
+# ==========================
+
+def iter_professors(path: Path):
+    """Produit les enregistrements un par un depuis un tableau JSON ou un fichier JSONL.
+
+    Le format est détecté sur le premier caractère non blanc (`[` : tableau, `{` : JSONL).
+    Seul l'enregistrement en cours de décodage est gardé en mémoire. Un BOM UTF-8 initial est ignoré ;
+    un tableau mal formé (virgule finale, contenu après `]`...) lève ValueError comme `json.load`.
+    """
+    with open(path, encoding="utf-8-sig") as f:
+        head = ""
+        while True:
+            block = f.read(READ_SIZE)
+            head += block
+            if head.strip() or not block:
+                break
+        first = head.lstrip()[:1]
+        if first == "[":
+            yield from _iter_json_array(f, head)
+        elif first == "{":
+            yield from _iter_json_lines(f, head)
+        elif first:
+            raise ValueError(f"{path} : ni tableau JSON ni JSONL (début : {first!r})")
+
+
+def iter_professor_chunks(path: Path, chunk_size: int = 1000):
+    """Comme `iter_professors`, par listes d'au plus `chunk_size` enregistrements."""
+    if chunk_size < 1:
+        raise ValueError("chunk_size doit être >= 1")
+    chunk = []
+    for record in iter_professors(path):
+        chunk.append(record)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _iter_json_lines(f, head: str):
+    lines = head.split("\n")
+    pending = lines.pop()
+    for line in lines:
+        if line.strip():
+            yield json.loads(line)
+    # `pending` est le début (éventuellement vide) de la ligne suivante
+    for line in f:
+        line = pending + line
+        pending = ""
+        if line.strip():
+            yield json.loads(line)
+    if pending.strip():
+        yield json.loads(pending)
+
+
+def _iter_json_array(f, buffer: str):
+    decoder = json.JSONDecoder()
+    pos = buffer.index("[") + 1
+    eof = False
+    expect_value = True  # après `[` ou `,` : un élément est attendu
+    empty = True  # `]` n'est accepté directement après `[` que pour un tableau vide
+
+    while True:
+        # Saute les blancs ; recharge le tampon si besoin
+        while True:
+            while pos < len(buffer) and buffer[pos].isspace():
+                pos += 1
+            if pos < len(buffer) or eof:
+                break
+            buffer, pos = buffer[pos:], 0
+            block = f.read(READ_SIZE)
+            eof = not block
+            buffer += block
+        if pos >= len(buffer):
+            raise ValueError("Tableau JSON non terminé")
+
+        ch = buffer[pos]
+        if ch == "]":
+            if expect_value and not empty:
+                raise ValueError("Virgule finale dans le tableau JSON")
+            _check_trailing(f, buffer[pos + 1:])
+            return
+        if ch == "," and not expect_value:
+            pos += 1
+            expect_value = True
+            continue
+        if ch != "{" or not expect_value:
+            raise ValueError(f"Élément inattendu dans le tableau JSON : {ch!r}")
+
+        # Décode un objet complet, en lisant la suite du fichier tant qu'il est tronqué
+        while True:
+            try:
+                record, end = decoder.raw_decode(buffer, pos)
+                break
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                buffer, pos = buffer[pos:], 0
+                block = f.read(READ_SIZE)
+                eof = not block
+                buffer += block
+        yield record
+        pos = end
+        expect_value = empty = False
+        # Libère ce qui a déjà été décodé
+        if pos > READ_SIZE:
+            buffer, pos = buffer[pos:], 0
+
+
+def _check_trailing(f, rest: str) -> None:
+    """Après le `]` final, seuls des blancs sont admis (comme `json.load`)."""
+    while True:
+        if rest.strip():
+            raise ValueError(f"Contenu inattendu après le tableau JSON : {rest.strip()[:20]!r}")
+        rest = f.read(READ_SIZE)
+        if not rest:
+            return
+
+
+# ==========================
+# 🔹 FORMAT DE L'API
+# ==========================
+
+def normalize_professor(record: dict) -> dict:
+    """Enregistrement brut du dataset -> professeur au format de `/api/predict`.
+
+    Champs manquants : chaînes vides, note 4.0 par défaut ; `firstname` est accepté pour `fistname`.
+    """
+    def text(value) -> str:
+        return "" if value is None else str(value)
+
+    return {
+        "fistname": text(record.get("fistname", record.get("firstname"))),
+        "lastname": text(record.get("lastname")),
+        "city": text(record.get("city")),
+        "description": text(record.get("description")),
+        "diplomas": [
+            {"level": text(d.get("level")), "title": text(d.get("title"))}
+            for d in record.get("diplomas") or []
+        ],
+        "experiences": [
+            {
+                "company": text(e.get("company")),
+                "title": text(e.get("title")),
+                "description": text(e.get("description")),
+                "duration": text(e.get("duration")),
+            }
+            for e in record.get("experiences") or []
+        ],
+        "pastCourses": [
+            {
+                "title": text(c.get("title")),
+                "description": text(c.get("description")),
+                "numberOfStars": float(4.0 if c.get("numberOfStars") is None else c["numberOfStars"]),
+            }
+            for c in record.get("pastCourses") or []
+        ],
+    }
+
+
+def sample_courses(records) -> list:
+    """Cours au format de l'API tirés des cours passés des enregistrements (description vide -> titre)."""
+    courses = []
+    for record in records:
+        for course in normalize_professor(record)["pastCourses"]:
+            courses.append({"title": course["title"], "description": course["description"] or course["title"]})
+    return courses
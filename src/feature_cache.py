@@ -0,0 +1,94 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+
+# ==========================
+# 🔹 CACHE LRU DES FEATURES PROFESSEUR
+# ==========================
+
+def payload_hash(payload: dict, collapse_whitespace: bool = False) -> str:
+    """Empreinte SHA-256 du JSON canonique d'un payload (clés triées, séparateurs compacts).
+
+    Le contenu des champs n'est pas modifié : deux textes qui ne diffèrent que par leurs espaces
+    peuvent donner des features différentes (mots-clés composés, longueurs) et ont deux clés.
+    `collapse_whitespace` fusionne les espaces superflus (dédoublonnage de src/data_cleaning.py).
+    """
+    if collapse_whitespace:
+        payload = _normalize(payload)
+    canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _normalize(value):
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, str):
+        return " ".join(value.split())
+    return value
+
+
+class ProfessorFeatureCache:
+    """Cache LRU borné des features côté professeur, indexé par le hash du payload.
+
+    Les valeurs stockées sont partagées entre requêtes : elles ne doivent pas être modifiées.
+    """
+
+    def __init__(self, maxsize: int = 2048):
+        if maxsize < 1:
+            raise ValueError("maxsize doit être >= 1")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, payload: dict, compute, namespace: str = ""):
+        """Renvoie les features en cache, ou les calcule via `compute(payload)` et les stocke.
+
+        `namespace` sépare les entrées calculées avec des référentiels différents (ex. version du modèle).
+        """
+        key = payload_hash(payload)
+        if namespace:
+            key = f"{namespace}:{key}"
+        value = self.get(key)
+        if value is None:
+            value = compute(payload)
+            self.put(key, value)
+        return value
+
+    def clear(self) -> None:
+        """Vide le cache (à appeler si le vectoriseur ou les référentiels changent)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
@@ -0,0 +1,249 @@
+import warnings
+
+import numpy as np
+import scipy.sparse as sp
+
+from src.feature_schema import FeatureSchema
+from src.metrics import NO_TIMER
+from src.smart_predictor import (
+    DOMAIN_KEYWORDS,
+    FEATURE_VERSION,
+    compute_professor_features,
+    compute_professor_features_batch,
+    compute_similarities,
+    compute_similarities_to_documents,
+    compute_similarities_to_vector,
+    extract_domain,
+    get_vectorizer,
+)
+from src.text_document import NormalizedDocument, tfidf_matrix
+
+# === CONFIGURATION ===
+# Features numériques calculées par le transformeur (les one-hot de domaine s'y ajoutent)
+NUMERIC_FEATURES = ["similarity", "degree_score", "prestige_score", "avg_stars", "n_experiences", "n_diplomas"]
+PROFESSOR_COLUMNS = ["degree_score", "prestige_score", "avg_stars", "n_experiences", "n_diplomas"]
+PROF_DOMAIN_PREFIX = "prof_domain_"
+COURSE_DOMAIN_PREFIX = "course_domain_"
+
+
+def default_feature_names(domains=None) -> list:
+    """Colonnes d'un modèle entraîné par src/model_training_contextual.py."""
+    domains = list(DOMAIN_KEYWORDS) if domains is None else list(domains)
+    return (
+        NUMERIC_FEATURES
+        + [f"{PROF_DOMAIN_PREFIX}{d}" for d in domains]
+        + [f"{COURSE_DOMAIN_PREFIX}{d}" for d in domains]
+    )
+
+
+def course_documents(course: dict):
+    """`(document "titre description", document description)` : chaque texte n'est découpé qu'une fois.
+
+    Le premier sert à la similarité, le second à la détection de domaine.
+    """
+    description = NormalizedDocument(course.get("description", ""))
+    return NormalizedDocument.join([NormalizedDocument(course.get("title", "")), description]), description
+
+
+# ==========================
+# 🔹 TRANSFORMEUR DE FEATURES
+# ==========================
+
+class FeatureTransformer:
+    """JSON brut `{"professor": {...}, "course": {...}}` -> matrice float32 dans l'ordre `feature_names`.
+
+    Seul code d'assemblage des features : l'entraînement, l'API et les outils hors ligne l'appellent,
+    et il est sauvegardé avec le régresseur (FeaturePipeline) avec son vectoriseur et sa configuration.
+    Les features côté professeur sont calculées une fois par objet professeur distinct du lot.
+    """
+
+    def __init__(self, vectorizer=None, feature_names=None, include_past_courses: bool = True):
+        self.vectorizer = vectorizer
+        self.feature_names = [str(n) for n in (default_feature_names() if feature_names is None else feature_names)]
+        self.include_past_courses = include_past_courses
+        self.feature_version = FEATURE_VERSION
+        self.schema = FeatureSchema(self.feature_names)
+        self.prof_domain_columns = self._one_hot_columns(PROF_DOMAIN_PREFIX)
+        self.course_domain_columns = self._one_hot_columns(COURSE_DOMAIN_PREFIX)
+
+    def _one_hot_columns(self, prefix: str) -> dict:
+        return {name[len(prefix):]: i for i, name in enumerate(self.feature_names) if name.startswith(prefix)}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.feature_version != FEATURE_VERSION:
+            warnings.warn(f"Transformeur sauvegardé avec FEATURE_VERSION={self.feature_version}, "
+                          f"code actuel : {FEATURE_VERSION} (réentraîner le modèle)")
+
+    def unknown_features(self) -> list:
+        """Colonnes attendues que le transformeur ne calcule pas (laissées à 0)."""
+        known = set(NUMERIC_FEATURES)
+        return [
+            name for name in self.feature_names
+            if name not in known and not name.startswith((PROF_DOMAIN_PREFIX, COURSE_DOMAIN_PREFIX))
+        ]
+
+    def professor_features(self, professor: dict, timer=NO_TIMER) -> dict:
+        """Features ne dépendant que du professeur (mises en cache par l'API)."""
+        return compute_professor_features(professor, self.vectorizer, timer, self.include_past_courses)
+
+    def professor_features_batch(self, professors) -> list:
+        """`professor_features` de tout un lot (génération hors ligne, cf. `transform_grid`)."""
+        return compute_professor_features_batch(professors, self.vectorizer, self.include_past_courses)
+
+    def transform(self, records, professor_features=None, timer=NO_TIMER) -> np.ndarray:
+        """Matrice des features d'un lot de paires prof/cours.
+
+        `professor_features(professor, timer)` remplace le calcul côté professeur (ex. cache LRU).
+        """
+        lookup = self.professor_features if professor_features is None else professor_features
+        professors, rows, positions = [], [], {}
+        for record in records:
+            professor = record["professor"]
+            pos = positions.get(id(professor))
+            if pos is None:
+                pos = positions[id(professor)] = len(professors)
+                professors.append(lookup(professor, timer))
+            rows.append(pos)
+        courses = [record["course"] for record in records]
+        rows = np.asarray(rows, dtype=np.intp)
+
+        with timer.stage("text_assembly"):
+            course_docs = [course_documents(c) for c in courses]
+        with timer.stage("domain_detection"):
+            course_domains = [extract_domain(description) for _, description in course_docs]
+
+        # Similarités de tout le lot en une seule opération creuse
+        with timer.stage("similarity"):
+            if not records:
+                similarity = np.zeros(0)
+            elif len(professors) == 1 and professors[0]["tfidf"] is not None:
+                # Un seul professeur (classement de cours) : un produit matrice creuse x vecteur
+                similarity = compute_similarities_to_vector(professors[0]["tfidf"], [doc for doc, _ in course_docs],
+                                                            self.vectorizer)
+            elif all(p["tfidf"] is not None for p in professors):
+                tfidf = sp.vstack([p["tfidf"] for p in professors], format="csr")[rows]
+                similarity = compute_similarities_to_documents(tfidf, [doc for doc, _ in course_docs],
+                                                               self.vectorizer)
+            else:
+                # Repli sans vectoriseur : TF-IDF ajusté paire par paire sur les textes
+                profile_texts = [professors[r]["profile_text"] for r in rows]
+                similarity = compute_similarities(profile_texts, [doc.text for doc, _ in course_docs],
+                                                  self.vectorizer)
+
+        with timer.stage("frame_building"):
+            X = self.schema.empty(len(courses))
+            self.schema.set_column(X, "similarity", similarity)
+            for name in PROFESSOR_COLUMNS:
+                if name in self.schema.index:
+                    X[:, self.schema.index[name]] = np.array([p[name] for p in professors], dtype=float)[rows]
+            self.schema.set_one_hot(X, self.prof_domain_columns, [professors[r]["prof_domain"] for r in rows])
+            self.schema.set_one_hot(X, self.course_domain_columns, course_domains)
+        return X
+
+    def transform_grid(self, professors: list, courses: list, timer=NO_TIMER) -> np.ndarray:
+        """Toutes les paires (professeur x cours) : `professors` sont des `professor_features`, `courses`
+        peu nombreux (ex. un cours par domaine). Lignes dans l'ordre professeur puis cours.
+
+        Mêmes valeurs que `transform` sur ces paires, mais les cours ne sont découpés qu'une fois
+        et les similarités sortent d'un seul produit creux (profils x cours).
+        """
+        n_prof, n_courses = len(professors), len(courses)
+        with timer.stage("text_assembly"):
+            course_docs = [course_documents(c) for c in courses]
+        with timer.stage("domain_detection"):
+            course_domains = [extract_domain(description) for _, description in course_docs]
+
+        with timer.stage("similarity"):
+            if not n_prof or not n_courses:
+                similarity = np.zeros((n_prof, n_courses))
+            elif all(p["tfidf"] is not None for p in professors):
+                vectorizer = get_vectorizer() if self.vectorizer is None else self.vectorizer
+                course_tfidf = tfidf_matrix([doc for doc, _ in course_docs], vectorizer)
+                tfidf = sp.vstack([p["tfidf"] for p in professors], format="csr")
+                similarity = (tfidf @ course_tfidf.T).toarray()
+            else:
+                # Repli sans vectoriseur : TF-IDF ajusté paire par paire sur les textes
+                similarity = compute_similarities(
+                    [p["profile_text"] for p in professors for _ in courses],
+                    [doc.text for _ in professors for doc, _ in course_docs],
+                    self.vectorizer,
+                )
+
+        with timer.stage("frame_building"):
+            X = self.schema.empty(n_prof * n_courses)
+            grid = X.reshape(n_prof, n_courses, len(self.schema))
+            self.schema.set_column(X, "similarity", np.asarray(similarity, dtype=float).ravel())
+            for name in PROFESSOR_COLUMNS:
+                if name in self.schema.index:
+                    grid[:, :, self.schema.index[name]] = np.array([p[name] for p in professors], dtype=float)[:, None]
+            domains = list(self.prof_domain_columns)
+            codes = {d: i for i, d in enumerate(domains)}
+            prof_codes = np.array([codes.get(p["prof_domain"], -1) for p in professors], dtype=np.intp)
+            self.schema.set_one_hot_codes(X, PROF_DOMAIN_PREFIX, domains, np.repeat(prof_codes, n_courses))
+            for c, domain in enumerate(course_domains):
+                col = self.course_domain_columns.get(domain)
+                if col is not None:
+                    grid[:, c, col] = 1.0
+        return X
+
+    def transform_index(self, index, course: dict, timer=NO_TIMER) -> np.ndarray:
+        """Tous les professeurs d'un index précalculé (src/professor_index.py) face à un cours."""
+        if index.include_past_courses != self.include_past_courses:
+            raise RuntimeError("L'index a été construit avec un autre texte de profil : le reconstruire")
+        with timer.stage("text_assembly"):
+            document, description = course_documents(course)
+        with timer.stage("domain_detection"):
+            course_domain = extract_domain(description)
+        with timer.stage("similarity"):
+            similarity = index.similarities(document, self.vectorizer)
+
+        with timer.stage("frame_building"):
+            X = self.schema.empty(len(index))
+            self.schema.set_column(X, "similarity", similarity)
+            for name in PROFESSOR_COLUMNS:
+                if name in self.schema.index:
+                    values = getattr(index, name, None)
+                    if values is None:
+                        raise RuntimeError(f"L'index ne contient pas {name} : le reconstruire")
+                    X[:, self.schema.index[name]] = values
+            self.schema.set_one_hot_codes(X, PROF_DOMAIN_PREFIX, index.domains, index.prof_domain)
+
+            # Même domaine de cours pour toutes les lignes
+            course_col = self.course_domain_columns.get(course_domain)
+            if course_col is not None:
+                X[:, course_col] = 1.0
+        return X
+
+
+# ==========================
+# 🔹 ARTEFACT TRANSFORMEUR + RÉGRESSEUR
+# ==========================
+
+class FeaturePipeline:
+    """Transformeur et régresseur sauvegardés ensemble : `predict(records)` sur du JSON brut.
+
+    Le régresseur (sklearn ou FlatTreeEnsemble) est ajusté sur la sortie de `features.transform`.
+    """
+
+    def __init__(self, features: FeatureTransformer, regressor):
+        self.features = features
+        self.regressor = regressor
+
+    @classmethod
+    def wrap(cls, regressor, vectorizer=None):
+        """Régresseur historique (pickle ou .npz sans transformeur) : features de l'API d'origine."""
+        names = getattr(regressor, "feature_names_in_", None)
+        if names is None:
+            raise ValueError("Le modèle n'expose pas feature_names_in_ (entraîné sans noms de colonnes)")
+        return cls(FeatureTransformer(vectorizer, feature_names=names, include_past_courses=True), regressor)
+
+    @property
+    def feature_names_in_(self) -> np.ndarray:
+        return np.asarray(self.features.feature_names, dtype=object)
+
+    def transform(self, records, professor_features=None, timer=NO_TIMER) -> np.ndarray:
+        return self.features.transform(records, professor_features, timer)
+
+    def predict(self, records) -> np.ndarray:
+        return self.regressor.predict(self.features.transform(records))
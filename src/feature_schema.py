@@ -0,0 +1,54 @@
+import numpy as np
+
+
+# ==========================
+# 🔹 SCHÉMA DES FEATURES DU MODÈLE
+# ==========================
+
+class FeatureSchema:
+    """Ordre fixe des colonnes attendues par le modèle, résolu une fois au chargement.
+
+    Remplace la construction d'un DataFrame + réindexation à chaque requête : les features
+    sont écrites directement dans une matrice float32 à l'index de leur colonne.
+    Les colonnes jamais renseignées restent à 0 (comme la réindexation historique).
+    """
+
+    def __init__(self, feature_names):
+        self.feature_names = [str(name) for name in feature_names]
+        self.index = {name: i for i, name in enumerate(self.feature_names)}
+        if len(self.index) != len(self.feature_names):
+            raise ValueError("Noms de features dupliqués dans le schéma")
+
+    @classmethod
+    def from_model(cls, model):
+        names = getattr(model, "feature_names_in_", None)
+        if names is None:
+            raise ValueError("Le modèle n'expose pas feature_names_in_ (entraîné sans noms de colonnes)")
+        return cls(names)
+
+    def __len__(self) -> int:
+        return len(self.feature_names)
+
+    def empty(self, n_rows: int = 1) -> np.ndarray:
+        """Matrice float32 pré-allouée (n_rows x n_features), initialisée à 0."""
+        return np.zeros((n_rows, len(self.feature_names)), dtype=np.float32)
+
+    def set_column(self, X: np.ndarray, name: str, values) -> None:
+        """Écrit une colonne si le modèle l'utilise (sinon ignorée)."""
+        idx = self.index.get(name)
+        if idx is not None:
+            X[:, idx] = values
+
+    def set_one_hot(self, X: np.ndarray, indices: dict, labels) -> None:
+        """Met à 1 la colonne du label de chaque ligne (labels inconnus du modèle ignorés)."""
+        for row, label in enumerate(labels):
+            idx = indices.get(label)
+            if idx is not None:
+                X[row, idx] = 1.0
+
+    def set_one_hot_codes(self, X: np.ndarray, prefix: str, labels, codes: np.ndarray) -> None:
+        """Variante vectorisée : `codes[i]` est l'index du label de la ligne i dans `labels` (-1 = aucun)."""
+        columns = np.array([self.index.get(f"{prefix}{label}", -1) for label in labels] + [-1])
+        cols = columns[np.asarray(codes)]  # le code -1 tombe sur la sentinelle finale
+        rows = np.flatnonzero(cols >= 0)
+        X[rows, cols[rows]] = 1.0
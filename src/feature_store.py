@@ -0,0 +1,105 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+from src.smart_predictor import (
+    DEGREE_LEVEL_SCORES,
+    DOMAIN_KEYWORDS,
+    FEATURE_VERSION,
+    PRESTIGIOUS_SCHOOLS,
+)
+
+# === CONFIGURATION ===
+STORE_DIR = Path("data/feature_store")
+
+
+# ==========================
+# 🔹 CLÉS DU CACHE DE FEATURES
+# ==========================
+
+def feature_config_hash(extra: dict = None) -> str:
+    """Empreinte des référentiels, de la version du code des features et de paramètres additionnels."""
+    config = {
+        "feature_version": FEATURE_VERSION,
+        "domain_keywords": DOMAIN_KEYWORDS,
+        "degree_level_scores": DEGREE_LEVEL_SCORES,
+        "prestigious_schools": PRESTIGIOUS_SCHOOLS,
+        "extra": extra or {},
+    }
+    canonical = json.dumps(config, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def vectorizer_fingerprint(vectorizer) -> str:
+    """Empreinte du vocabulaire et des IDF (les similarités en dépendent)."""
+    if vectorizer is None:
+        return "per-pair"
+    h = hashlib.sha256()
+    h.update(json.dumps(sorted(vectorizer.vocabulary_.items()), ensure_ascii=False).encode("utf-8"))
+    h.update(np.ascontiguousarray(vectorizer.idf_).tobytes())
+    return h.hexdigest()
+
+
+def file_fingerprint(path: Path) -> dict:
+    """Chemin, taille et date de modification : si rien n'a bougé, le fichier n'est pas relu."""
+    stat = os.stat(path)
+    return {"path": str(Path(path).resolve()), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+# ==========================
+# 🔹 STOCKAGE COLONNAIRE (.npz)
+# ==========================
+
+class FeatureStore:
+    """Matrice de features + cibles en colonnes compressées, une par configuration de features.
+
+    `record_hashes[i]` est le hash du i-ème enregistrement source ; ses lignes générées sont
+    les `rows_per_record` lignes consécutives à partir de `i * rows_per_record`.
+    """
+
+    def __init__(self, store_dir: Path, key: str):
+        self.path = Path(store_dir) / f"features_{key[:16]}.npz"
+
+    def load(self):
+        """Renvoie {"columns", "record_hashes", "rows_per_record", "fingerprint"} ou None."""
+        if not self.path.exists():
+            return None
+        with np.load(self.path, allow_pickle=False) as data:
+            meta = json.loads(str(data["__meta__"]))
+            columns = {name: data[name] for name in meta["columns"]}
+            record_hashes = data["__record_hashes__"].tolist()
+        for name in meta["object_columns"]:
+            columns[name] = np.array([v if v != "" else None for v in columns[name].tolist()], dtype=object)
+        return {
+            "columns": columns,
+            "record_hashes": record_hashes,
+            "rows_per_record": meta["rows_per_record"],
+            "fingerprint": meta["fingerprint"],
+        }
+
+    def save(self, columns: dict, record_hashes: list, rows_per_record: int, fingerprint: dict) -> None:
+        arrays, object_columns = {}, []
+        for name, values in columns.items():
+            if values.dtype == object:
+                # Colonnes texte / identifiants : stockées en chaînes (None -> "")
+                object_columns.append(name)
+                values = np.array(["" if v is None or v != v else str(v) for v in values], dtype=str)
+            arrays[name] = values
+        meta = {
+            "columns": list(columns),
+            "object_columns": object_columns,
+            "rows_per_record": rows_per_record,
+            "fingerprint": fingerprint,
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp.npz")
+        np.savez_compressed(
+            tmp_path,
+            __meta__=np.array(json.dumps(meta)),
+            __record_hashes__=np.array(record_hashes, dtype=str),
+            **arrays,
+        )
+        os.replace(tmp_path, self.path)
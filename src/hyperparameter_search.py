@@ -0,0 +1,180 @@
+import json
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from sklearn.model_selection import GroupKFold
+
+# === CONFIGURATION ===
+SEARCH_LOG_PATH = Path("models/search_log.jsonl")
+# Espace de recherche du GradientBoostingRegressor ; n_estimators est le budget du successive halving
+PARAM_SPACE = {
+    "learning_rate": [0.02, 0.05, 0.1, 0.2],
+    "max_depth": [2, 3, 4, 5],
+    "min_samples_leaf": [1, 2, 3, 5, 10],
+    "subsample": [0.7, 0.85, 1.0],
+    "max_features": [None, "sqrt", 0.5],
+}
+N_CONFIGS = 27
+N_FOLDS = 3
+ETA = 3  # à chaque palier, 1 configuration sur ETA est conservée et son budget multiplié par ETA
+MIN_ESTIMATORS = 50
+MAX_ESTIMATORS = 400
+
+
+# ==========================
+# 🔹 CONFIGURATIONS ET PALIERS
+# ==========================
+
+def sample_configs(space: dict, n_configs: int, seed: int) -> list:
+    """Configurations distinctes tirées au hasard (toutes si l'espace est plus petit)."""
+    rng = random.Random(seed)
+    total = math.prod(len(values) for values in space.values())
+    configs, seen = [], set()
+    while len(configs) < min(n_configs, total):
+        config = {name: rng.choice(values) for name, values in space.items()}
+        key = json.dumps(config, sort_keys=True)
+        if key not in seen:
+            seen.add(key)
+            configs.append(config)
+    return configs
+
+
+def rung_budgets(min_resource: int, max_resource: int, eta: int) -> list:
+    """Budgets `min_resource * eta**r` tant qu'ils restent sous `max_resource`, puis `max_resource`
+    (ex. 50, 150, 400 pour 50, 400 et eta=3)."""
+    budgets = []
+    budget = min_resource
+    while budget < max_resource:
+        budgets.append(budget)
+        budget *= eta
+    return budgets + [max_resource]
+
+
+# ==========================
+# 🔹 ESSAIS (POOL DE PROCESSUS)
+# ==========================
+
+_X = _y = _folds = _build_model = None
+
+
+def _init_worker(X, y, folds, build_model) -> None:
+    """Features et plis transmis une fois par processus, partagés par tous ses essais."""
+    global _X, _y, _folds, _build_model
+    _X, _y, _folds, _build_model = X, y, folds, build_model
+
+
+def _fit_fold(params: dict, fold: int) -> dict:
+    train_idx, valid_idx = _folds[fold]
+    start = time.perf_counter()
+    model = _build_model(**params)
+    model.fit(_X[train_idx], _y[train_idx])
+    y_pred = model.predict(_X[valid_idx])
+    y_true = _y[valid_idx]
+    return {
+        "mae": float(mean_absolute_error(y_true, y_pred)),
+        "rmse": float(np.sqrt(mean_squared_error(y_true, y_pred))),
+        "r2": float(r2_score(y_true, y_pred)),
+        "wall_s": time.perf_counter() - start,
+    }
+
+
+def _as_completed(pool, tasks: list):
+    """(tâche, résultat) au fil de l'eau ; exécution séquentielle si `pool` est None."""
+    if pool is None:
+        for task in tasks:
+            yield task, _fit_fold(*task[1:])
+        return
+    futures = {pool.submit(_fit_fold, *task[1:]): task for task in tasks}
+    for future in as_completed(futures):
+        yield futures[future], future.result()
+
+
+# ==========================
+# 🔹 SUCCESSIVE HALVING
+# ==========================
+
+def successive_halving(X, y, groups, build_model, n_configs: int = N_CONFIGS, n_folds: int = N_FOLDS,
+                       eta: int = ETA, min_resource: int = MIN_ESTIMATORS, max_resource: int = MAX_ESTIMATORS,
+                       n_jobs: int = 1, seed: int = 42, space: dict = PARAM_SPACE,
+                       log_path: Path = SEARCH_LOG_PATH) -> dict:
+    """Recherche des hyperparamètres de `build_model` par validation croisée et successive halving.
+
+    Toutes les configurations sont évaluées avec `min_resource` arbres ; seul le meilleur
+    tiers (1/eta, MAE moyenne) passe au palier suivant, avec eta fois plus d'arbres.
+    Les plis sont groupés par professeur (`groups`) : ses paires ne sont jamais à la fois
+    en entraînement et en validation. Chaque essai (configuration x palier) est ajouté au
+    journal JSONL `log_path` dès qu'il se termine. Renvoie le meilleur essai du dernier palier.
+    """
+    X = np.ascontiguousarray(X, dtype=float)
+    y = np.asarray(y, dtype=float)
+    folds = list(GroupKFold(n_splits=n_folds).split(X, y, groups))
+    configs = sample_configs(space, n_configs, seed)
+    budgets = rung_budgets(min_resource, max_resource, eta)
+    search_id = time.strftime("%Y%m%dT%H%M%S")
+    started = time.perf_counter()
+
+    log_path = Path(log_path)
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    pool = None
+    if n_jobs > 1:
+        pool = ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                                   initargs=(X, y, folds, build_model))
+    else:
+        _init_worker(X, y, folds, build_model)
+
+    def write(log, event: str, **fields) -> None:
+        log.write(json.dumps({"search_id": search_id, "event": event, **fields}, ensure_ascii=False) + "\n")
+        log.flush()
+
+    try:
+        with open(log_path, "a", encoding="utf-8") as log:
+            write(log, "start", n_rows=len(y), n_features=X.shape[1], n_configs=len(configs),
+                  n_folds=n_folds, eta=eta, budgets=budgets, n_jobs=n_jobs, seed=seed)
+            candidates = list(range(len(configs)))
+            n_trials = 0
+            for rung, budget in enumerate(budgets):
+                print(f"🔎 Palier {rung + 1}/{len(budgets)} : {len(candidates)} configurations x "
+                      f"{n_folds} plis, {budget} arbres")
+                tasks = [(cid, {**configs[cid], "n_estimators": budget}, fold)
+                         for cid in candidates for fold in range(n_folds)]
+                n_trials += len(candidates)
+                fold_results = {cid: [] for cid in candidates}
+                trials = {}
+                for (cid, params, _), result in _as_completed(pool, tasks):
+                    fold_results[cid].append(result)
+                    if len(fold_results[cid]) < n_folds:
+                        continue
+                    results = fold_results[cid]
+                    maes = [r["mae"] for r in results]
+                    trials[cid] = {
+                        "config_id": cid,
+                        "rung": rung,
+                        "params": params,
+                        "mae": round(float(np.mean(maes)), 5),
+                        "mae_std": round(float(np.std(maes)), 5),
+                        "rmse": round(float(np.mean([r["rmse"] for r in results])), 5),
+                        "r2": round(float(np.mean([r["r2"] for r in results])), 5),
+                        "wall_s": round(sum(r["wall_s"] for r in results), 3),
+                    }
+                    write(log, "trial", **trials[cid])
+
+                ranked = sorted(candidates, key=lambda cid: trials[cid]["mae"])
+                if rung < len(budgets) - 1:
+                    candidates = ranked[:max(1, len(ranked) // eta)]
+                    write(log, "rung", rung=rung, n_estimators=budget, kept=candidates)
+            best = trials[ranked[0]]
+            elapsed = round(time.perf_counter() - started, 3)
+            write(log, "best", elapsed_s=elapsed, **best)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    print(f"🏆 Meilleure configuration ({n_trials} essais, {elapsed:.1f} s) : MAE={best['mae']:.3f} "
+          f"± {best['mae_std']:.3f} | {best['params']}")
+    print(f"📝 Journal des essais : {log_path}")
+    return best
@@ -0,0 +1,111 @@
+from collections import deque
+
+# En dessous de ce nombre de mots-clés distincts, `k in text` (recherche en C) bat l'automate
+# parcouru en Python : ~3x plus rapide pour les 37 mots-clés de domaine, égalité vers 110
+SCAN_MAX_KEYWORDS = 100
+
+
+# ==========================
+# 🔹 AUTOMATE AHO-CORASICK
+# ==========================
+
+class KeywordMatcher:
+    """Automate Aho-Corasick compilé une fois à partir d'un dictionnaire {label: [mots-clés]}.
+
+    `count(text)` reproduit `{label: sum(k in text for k in kws)}` (présence de sous-chaîne,
+    chevauchements compris) en un seul passage sur le texte, quel que soit le nombre de mots-clés.
+    Avec au plus `scan_max_keywords` mots-clés distincts, l'automate n'est pas parcouru : chaque
+    mot-clé est cherché par `k in text`, plus rapide pour un petit dictionnaire.
+    """
+
+    def __init__(self, keywords_by_label: dict, scan_max_keywords: int = SCAN_MAX_KEYWORDS):
+        self.labels = list(keywords_by_label)
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]
+        # Un mot-clé peut appartenir à plusieurs labels (ou être répété dans un même label)
+        self._keyword_labels = []
+
+        keyword_ids = {}
+        for label_idx, keywords in enumerate(keywords_by_label.values()):
+            for keyword in keywords:
+                if not keyword:
+                    # Comme `"" in text` : toujours présent dans un texte non vide
+                    keyword_id = keyword_ids.setdefault("", len(self._keyword_labels))
+                else:
+                    keyword_id = keyword_ids.get(keyword)
+                    if keyword_id is None:
+                        keyword_id = keyword_ids[keyword] = len(self._keyword_labels)
+                        self._insert(keyword, keyword_id)
+                if keyword_id == len(self._keyword_labels):
+                    self._keyword_labels.append([])
+                self._keyword_labels[keyword_id].append(label_idx)
+        self._empty_id = keyword_ids.get("")
+        self._scan = list(keyword_ids.items()) if len(keyword_ids) <= scan_max_keywords else None
+        self._build_failure_links()
+
+    def _insert(self, keyword: str, keyword_id: int) -> None:
+        node = 0
+        for ch in keyword:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            node = nxt
+        self._out[node] = self._out[node] + (keyword_id,)
+
+    def _build_failure_links(self) -> None:
+        # Parcours en largeur : liens d'échec puis transitions complètes (automate déterministe),
+        # pour que la recherche ne fasse qu'une consultation de dictionnaire par caractère.
+        order = []
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            order.append(node)
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(ch, 0)
+                # Les sorties du lien d'échec sont héritées (mots-clés suffixes)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+        # Seules les transitions vers un état non racine sont stockées
+        self._delta = [None] * len(self._goto)
+        self._delta[0] = dict(self._goto[0])
+        for node in order:
+            delta = dict(self._delta[self._fail[node]])
+            delta.update(self._goto[node])
+            self._delta[node] = delta
+
+    def matched(self, text: str) -> set:
+        """Identifiants des mots-clés présents dans le texte (un seul passage)."""
+        if self._scan is not None:
+            return {keyword_id for keyword, keyword_id in self._scan if keyword in text}
+        delta, out = self._delta, self._out
+        found = set()
+        node = 0
+        for ch in text:
+            node = delta[node].get(ch, 0)
+            if out[node]:
+                found.update(out[node])
+        if self._empty_id is not None:
+            found.add(self._empty_id)
+        return found
+
+    def count(self, text: str) -> dict:
+        """Nombre de mots-clés distincts trouvés par label, dans l'ordre du dictionnaire."""
+        counts = [0] * len(self.labels)
+        for keyword_id in self.matched(text):
+            for label_idx in self._keyword_labels[keyword_id]:
+                counts[label_idx] += 1
+        return dict(zip(self.labels, counts))
+
+    def best(self, text: str):
+        """Label au score maximal ; en cas d'égalité, le premier dans l'ordre du dictionnaire."""
+        counts = self.count(text)
+        return max(counts, key=counts.get) if counts else None
@@ -0,0 +1,226 @@
+import argparse
+import asyncio
+import itertools
+import json
+import random
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+from src.data_loader import iter_professors, normalize_professor, sample_courses
+
+# === CONFIGURATION ===
+# 🔧 serveur local (python serve.py) ; --url pour une autre adresse
+API_URL = "http://127.0.0.1:8000"
+DATA_PATH = Path("data/data_train.json")
+ROUTES = {
+    "predict": "/api/predict",
+    "async": "/api/predict/async",
+    "batch": "/api/predict/batch",
+}
+PERCENTILES = (50, 90, 95, 99, 99.9)
+
+
+# ==========================
+# 🔹 REQUÊTES À PARTIR DU DATASET
+# ==========================
+
+def build_payloads(data_path: Path, route: str, batch_size: int, n_payloads: int, seed: int) -> list:
+    """Requêtes valides (schéma de l'API) : professeurs du dataset x cours tirés de leurs cours passés."""
+    records = list(iter_professors(data_path))
+    if not records:
+        raise SystemExit(f"❌ Aucun professeur dans {data_path}")
+    professors = [normalize_professor(r) for r in records]
+    courses = sample_courses(records)
+    rng = random.Random(seed)
+
+    def pair():
+        return {"professor": rng.choice(professors), "course": rng.choice(courses)}
+
+    if route == "batch":
+        return [{"items": [pair() for _ in range(batch_size)]} for _ in range(n_payloads)]
+    return [pair() for _ in range(n_payloads)]
+
+
+# ==========================
+# 🔹 GÉNÉRATION DE CHARGE
+# ==========================
+
+class Recorder:
+    """Latences et erreurs des requêtes terminées après la période de chauffe."""
+
+    def __init__(self, measure_from: float):
+        self.measure_from = measure_from
+        self.latencies = []
+        self.errors = Counter()
+        self.ok = 0
+
+    def record(self, started: float, latency: float, error: str = None) -> None:
+        if started < self.measure_from:
+            return
+        if error is None:
+            self.ok += 1
+            self.latencies.append(latency)
+        else:
+            self.errors[error] += 1
+
+
+async def send(client, path: str, payload: dict):
+    """Envoie une requête ; renvoie None ou la nature de l'erreur."""
+    try:
+        response = await client.post(path, json=payload)
+    except Exception as e:
+        return type(e).__name__
+    if response.status_code != 200:
+        return f"HTTP {response.status_code}"
+    return None
+
+
+async def closed_loop(client, path: str, payloads: list, concurrency: int, deadline: float, recorder: Recorder):
+    """`concurrency` clients enchaînent les requêtes : chacun attend la réponse avant la suivante."""
+    stream = itertools.cycle(payloads)
+
+    async def user():
+        loop = asyncio.get_running_loop()
+        while loop.time() < deadline:
+            started = loop.time()
+            error = await send(client, path, next(stream))
+            recorder.record(started, loop.time() - started, error)
+
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+
+
+async def open_loop(client, path: str, payloads: list, rate: float, poisson: bool, max_in_flight: int,
+                    deadline: float, recorder: Recorder, seed: int):
+    """Requêtes émises à `rate` par seconde quel que soit le temps de réponse du serveur.
+
+    La latence est mesurée depuis l'instant d'émission prévu : le retard pris côté client
+    (file d'attente) est compté, au lieu d'être masqué (« coordinated omission »).
+    """
+    loop = asyncio.get_running_loop()
+    rng = random.Random(seed)
+    stream = itertools.cycle(payloads)
+    in_flight = set()
+    scheduled = loop.time()
+
+    async def one(intended: float, payload: dict):
+        error = await send(client, path, payload)
+        recorder.record(intended, loop.time() - intended, error)
+
+    while scheduled < deadline:
+        delay = scheduled - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if len(in_flight) >= max_in_flight:
+            # Le client ne suit plus : la requête est comptée en erreur plutôt que retardée
+            recorder.record(scheduled, 0.0, "client_overload")
+        else:
+            task = asyncio.create_task(one(scheduled, next(stream)))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+        scheduled += rng.expovariate(rate) if poisson else 1.0 / rate
+
+    if in_flight:
+        await asyncio.gather(*in_flight)
+
+
+async def run(args, payloads: list) -> dict:
+    try:
+        import httpx
+    except ImportError:
+        raise SystemExit("❌ Le générateur de charge nécessite httpx : pip install httpx")
+
+    path = ROUTES[args.route]
+    limit = args.concurrency if args.rate is None else args.max_in_flight
+    limits = httpx.Limits(max_connections=limit, max_keepalive_connections=limit)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=args.timeout) as client:
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        recorder = Recorder(measure_from=start + args.warmup)
+        deadline = start + args.warmup + args.duration
+        if args.rate is None:
+            await closed_loop(client, path, payloads, args.concurrency, deadline, recorder)
+        else:
+            await open_loop(client, path, payloads, args.rate, args.arrival == "poisson", args.max_in_flight,
+                            deadline, recorder, args.seed)
+        elapsed = loop.time() - recorder.measure_from
+
+    rows_per_request = args.batch_size if args.route == "batch" else 1
+    return report(recorder, elapsed, rows_per_request)
+
+
+# ==========================
+# 🔹 RAPPORT
+# ==========================
+
+def report(recorder: Recorder, elapsed: float, rows_per_request: int) -> dict:
+    total = recorder.ok + sum(recorder.errors.values())
+    latencies = np.asarray(recorder.latencies) * 1000
+    result = {
+        "duration_s": round(elapsed, 3),
+        "requests": total,
+        "ok": recorder.ok,
+        "errors": dict(recorder.errors),
+        "error_rate": round(sum(recorder.errors.values()) / total, 4) if total else 0.0,
+        "throughput_rps": round(recorder.ok / elapsed, 2) if elapsed > 0 else 0.0,
+        "rows_per_s": round(recorder.ok * rows_per_request / elapsed, 2) if elapsed > 0 else 0.0,
+        "latency_ms": {},
+    }
+    if latencies.size:
+        result["latency_ms"] = {
+            **{f"p{p:g}": round(float(np.percentile(latencies, p)), 3) for p in PERCENTILES},
+            "mean": round(float(latencies.mean()), 3),
+            "max": round(float(latencies.max()), 3),
+        }
+    return result
+
+
+def print_report(result: dict, args) -> None:
+    mode = f"{args.concurrency} clients" if args.rate is None else f"{args.rate:g} req/s ({args.arrival})"
+    print(f"\n📊 {ROUTES[args.route]} — {mode} — {result['duration_s']} s mesurées")
+    print(f"  Requêtes : {result['requests']} (ok : {result['ok']}, taux d'erreur : {result['error_rate']:.2%})")
+    for error, count in result["errors"].items():
+        print(f"    ❌ {error} : {count}")
+    print(f"  Débit : {result['throughput_rps']} req/s, {result['rows_per_s']} prédictions/s")
+    if result["latency_ms"]:
+        print("  Latence (ms) : " + ", ".join(f"{k}={v}" for k, v in result["latency_ms"].items()))
+
+
+# === LIGNE DE COMMANDE ===
+def main():
+    parser = argparse.ArgumentParser(description="Génère de la charge sur l'API de prédiction (planification de capacité).")
+    parser.add_argument("--url", default=API_URL)
+    parser.add_argument("--route", choices=sorted(ROUTES), default="predict")
+    parser.add_argument("--batch-size", type=int, default=10, help="paires par requête pour --route batch")
+    parser.add_argument("--data", type=Path, default=DATA_PATH)
+    parser.add_argument("--payloads", type=int, default=1000, help="requêtes distinctes générées (rejouées en boucle)")
+    parser.add_argument("--concurrency", type=int, default=8, help="clients simultanés (boucle fermée)")
+    parser.add_argument("--rate", type=float, default=None, help="req/s en boucle ouverte (remplace --concurrency)")
+    parser.add_argument("--arrival", choices=("uniform", "poisson"), default="poisson")
+    parser.add_argument("--max-in-flight", type=int, default=1000, help="requêtes simultanées max en boucle ouverte")
+    parser.add_argument("--duration", type=float, default=30.0, help="secondes mesurées")
+    parser.add_argument("--warmup", type=float, default=3.0, help="secondes de chauffe non comptées")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", type=Path, default=None, help="rapport JSON")
+    args = parser.parse_args()
+    if args.rate is not None and args.rate <= 0:
+        parser.error("--rate doit être > 0")
+    if args.concurrency < 1 or args.batch_size < 1:
+        parser.error("--concurrency et --batch-size doivent être >= 1")
+
+    payloads = build_payloads(args.data, args.route, args.batch_size, args.payloads, args.seed)
+    print(f"🚀 {len(payloads)} requêtes construites depuis {args.data} -> {args.url}{ROUTES[args.route]}")
+    result = asyncio.run(run(args, payloads))
+    print_report(result, args)
+
+    if args.out is not None:
+        config = {k: (str(v) if isinstance(v, Path) else v) for k, v in vars(args).items() if k != "out"}
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"config": config, "result": result}, f, ensure_ascii=False, indent=2)
+        print(f"📦 Rapport sauvegardé dans : {args.out}")
+
+
+if __name__ == "__main__":
+    main()
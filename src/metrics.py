@@ -0,0 +1,187 @@
+import bisect
+import threading
+import time
+from contextlib import nullcontext
+from contextvars import ContextVar
+
+# Bornes (secondes) des histogrammes de latence : de 100 µs à 10 s
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Début de la requête HTTP en cours (posé par le middleware de l'API)
+request_started = ContextVar("request_started", default=None)
+
+
+# ==========================
+# 🔹 MÉTRIQUES AU FORMAT PROMETHEUS
+# ==========================
+
+def _format_labels(labelnames, values) -> str:
+    if not labelnames:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in values)
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(labelnames, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class Counter:
+    """Compteur monotone, une série par combinaison de labels."""
+
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield self.name, _format_labels(self.labelnames, key), value
+
+
+class Histogram:
+    """Histogramme cumulatif (`_bucket`, `_sum`, `_count`), une série par combinaison de labels."""
+
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # labels -> [comptes par borne (+Inf en dernier), somme]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(labels[name] for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def samples(self):
+        with self._lock:
+            items = [(key, list(counts), total) for key, (counts, total) in self._series.items()]
+        bucket_names = self.labelnames + ("le",)
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                yield f"{self.name}_bucket", _format_labels(bucket_names, key + (_format_value(bound),)), cumulative
+            yield f"{self.name}_sum", _format_labels(self.labelnames, key), total
+            yield f"{self.name}_count", _format_labels(self.labelnames, key), cumulative
+
+
+class CallbackGauge:
+    """Jauge lue à chaque export : `fn()` renvoie une liste de (dict de labels, valeur)."""
+
+    type = "gauge"
+
+    def __init__(self, name: str, help: str, fn):
+        self.name = name
+        self.help = help
+        self.fn = fn
+
+    def samples(self):
+        for labels, value in self.fn():
+            yield self.name, _format_labels(tuple(labels), tuple(labels.values())), value
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Format texte d'exposition Prometheus (version 0.0.4)."""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# ==========================
+# 🔹 CHRONOMÉTRAGE PAR ÉTAPE
+# ==========================
+
+class _Stage:
+    __slots__ = ("timer", "name", "t0")
+
+    def __init__(self, timer, name: str):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timer.add(self.name, time.perf_counter() - self.t0)
+        return False
+
+
+class StageTimer:
+    """Durées cumulées par étape pour une requête (une étape peut être chronométrée plusieurs fois)."""
+
+    def __init__(self):
+        self.durations = {}
+
+    @classmethod
+    def for_request(cls):
+        """Nouveau chronomètre ; l'étape `parsing` couvre le début de la requête jusqu'à cet appel
+        (lecture du corps, décodage JSON et validation pydantic)."""
+        timer = cls()
+        started = request_started.get()
+        if started is not None:
+            timer.add("parsing", time.perf_counter() - started)
+        return timer
+
+    def stage(self, name: str) -> _Stage:
+        return _Stage(self, name)
+
+    def add(self, name: str, seconds: float) -> None:
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+
+    def observe(self, histogram: Histogram, **labels) -> None:
+        for name, seconds in self.durations.items():
+            histogram.observe(seconds, stage=name, **labels)
+
+
+class _NullTimer:
+    """Chronomètre inactif (appels hors requête HTTP, scripts)."""
+
+    _stage = nullcontext()
+
+    def stage(self, name: str):
+        return self._stage
+
+    def add(self, name: str, seconds: float) -> None:
+        pass
+
+    def observe(self, histogram: Histogram, **labels) -> None:
+        pass
+
+
+NO_TIMER = _NullTimer()
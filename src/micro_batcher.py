@@ -0,0 +1,124 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+# ==========================
+# 🔹 MICRO-BATCHING DES PRÉDICTIONS
+# ==========================
+
+class MicroBatcher:
+    """Regroupe les lignes de features de requêtes concurrentes en un seul appel au modèle.
+
+    Un lot part dès qu'il atteint `max_batch_size` lignes ou que la première ligne a attendu
+    `max_wait_ms` millisecondes. `predict_fn(X)` s'exécute sur un thread dédié : l'event loop
+    continue d'accumuler le lot suivant pendant l'inférence.
+    Une ligne peut fournir son propre `predict_fn` (ex. le modèle de la version qui l'a
+    construite) : un lot est alors découpé en un appel par prédicteur.
+    """
+
+    def __init__(self, predict_fn=None, max_batch_size: int = 64, max_wait_ms: float = 5.0):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size doit être >= 1")
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.batches = 0
+        self.rows = 0
+        self.max_seen_batch_size = 0
+        self._queue = None
+        self._task = None
+        self._executor = None
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+        self._queue = asyncio.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="micro-batcher")
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        # Les requêtes encore en file sont annulées plutôt que laissées en attente
+        while not self._queue.empty():
+            _, _, future = self._queue.get_nowait()
+            if not future.done():
+                future.cancel()
+        self._executor.shutdown(wait=True)
+        self._task = None
+
+    async def submit(self, row: np.ndarray, predict_fn=None) -> float:
+        """Ajoute une ligne (1 x n_features) à la file et attend sa prédiction."""
+        if self._task is None:
+            raise RuntimeError("MicroBatcher non démarré")
+        predict_fn = predict_fn or self.predict_fn
+        if predict_fn is None:
+            raise ValueError("Aucun predict_fn pour cette ligne")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((row, predict_fn, future))
+        return await future
+
+    async def _collect(self) -> list:
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            # Ce qui est déjà en file est pris sans attendre
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            # Les appelants partis (déconnexion) ne comptent plus
+            batch = [item for item in batch if not item[2].done()]
+            if not batch:
+                continue
+            groups = {}
+            for row, predict_fn, future in batch:
+                groups.setdefault(predict_fn, []).append((row, future))
+
+            for predict_fn, group in groups.items():
+                try:
+                    X = np.vstack([row for row, _ in group])
+                    y_pred = await loop.run_in_executor(self._executor, predict_fn, X)
+                except Exception as e:
+                    for _, future in group:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                for (_, future), y in zip(group, y_pred):
+                    if not future.done():
+                        future.set_result(float(y))
+
+            self.batches += 1
+            self.rows += len(batch)
+            self.max_seen_batch_size = max(self.max_seen_batch_size, len(batch))
+
+    def stats(self) -> dict:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "batches": self.batches,
+            "rows": self.rows,
+            "mean_batch_size": round(self.rows / self.batches, 2) if self.batches else 0.0,
+            "max_seen_batch_size": self.max_seen_batch_size,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+        }
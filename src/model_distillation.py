@@ -0,0 +1,190 @@
+import argparse
+import json
+import os
+import time
+import warnings
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import GradientBoostingRegressor, HistGradientBoostingRegressor, RandomForestRegressor
+from sklearn.metrics import mean_absolute_error
+from sklearn.model_selection import train_test_split
+
+from src.data_loader import iter_professors
+from src.feature_pipeline import FeaturePipeline, FeatureTransformer
+from src.model_registry import load_artifact
+from src.model_training_contextual import SIMULATION_SEED, domain_courses, simulate_notes
+from src.tree_export import check_predictions, flatten_ensemble, sample_inputs
+
+# === CONFIGURATION ===
+TEACHER_PATH = Path("models/model_contextual_randomforest.pkl")
+COMPACT_MODEL_PATH = Path("models/model_contextual_compact.pkl")
+DATA_PATH = Path("data/data_train.json")
+REPORT_PATH = Path("models/distillation_report.json")
+# Features continues bruitées pour enrichir le jeu de transfert (les one-hot restent intactes)
+CONTINUOUS_FEATURES = ["similarity", "degree_score", "prestige_score", "avg_stars"]
+AUGMENT_COPIES = 4
+AUGMENT_NOISE = 0.1  # écart-type du bruit, en fraction de l'écart-type de la colonne
+LATENCY_ROWS = 500
+
+# Élèves : peu d'arbres peu profonds, tous ajustés sur les prédictions du professeur
+STUDENTS = {
+    "gbr": lambda seed: GradientBoostingRegressor(n_estimators=150, max_depth=3, learning_rate=0.1,
+                                                  random_state=seed),
+    "forest": lambda seed: RandomForestRegressor(n_estimators=30, max_depth=8, min_samples_leaf=2,
+                                                 random_state=seed),
+    "hgb": lambda seed: HistGradientBoostingRegressor(max_iter=150, max_depth=4, learning_rate=0.1,
+                                                      random_state=seed),
+}
+
+
+# ==========================
+# 🔹 JEU DE TRANSFERT
+# ==========================
+
+def transfer_frame(data_path: Path, features: FeatureTransformer, seed: int = SIMULATION_SEED):
+    """Paires (professeur x domaine) du dataset et leurs features servies : `(paires, X, y simulée)`.
+
+    Notes simulées comme à l'entraînement (src/model_training_contextual.py).
+    """
+    records = list(iter_professors(data_path))
+    courses = domain_courses()
+    prof_features = features.professor_features_batch(records)
+    pairs = [{"professor": p, "course": c} for p in records for c in courses]
+    X = features.transform_grid(prof_features, courses)
+    notes = simulate_notes([f["prof_domain"] for f in prof_features], np.random.default_rng(seed))
+    return pairs, pd.DataFrame(X, columns=features.feature_names), np.round(notes, 2).ravel()
+
+
+def augment(X: pd.DataFrame, copies: int, noise: float, seed: int) -> pd.DataFrame:
+    """Ajoute `copies` versions bruitées des lignes : le professeur étiquette des points voisins
+    de la distribution réelle, ce qui lisse ce que l'élève apprend entre les exemples."""
+    if copies <= 0:
+        return X
+    rng = np.random.default_rng(seed)
+    columns = [c for c in CONTINUOUS_FEATURES if c in X.columns]
+    low, high, std = X[columns].min(), X[columns].max(), X[columns].std().fillna(0.0)
+    parts = [X]
+    for _ in range(copies):
+        noisy = X.copy()
+        jitter = rng.normal(0.0, 1.0, size=(len(X), len(columns))) * (noise * std.to_numpy())
+        noisy[columns] = np.clip(X[columns].to_numpy() + jitter, low.to_numpy(), high.to_numpy())
+        parts.append(noisy)
+    return pd.concat(parts, ignore_index=True)
+
+
+# ==========================
+# 🔹 RAPPORT PAR NIVEAU
+# ==========================
+
+def latency_ms(model, X: np.ndarray) -> dict:
+    """Latence d'une prédiction ligne par ligne (comme /api/predict) et d'un lot complet."""
+    timings = []
+    for row in X[:LATENCY_ROWS]:
+        t0 = time.perf_counter()
+        model.predict(row[None, :])
+        timings.append((time.perf_counter() - t0) * 1000)
+    t0 = time.perf_counter()
+    model.predict(X)
+    batch_ms = (time.perf_counter() - t0) * 1000
+    return {
+        "p50_ms": round(float(np.percentile(timings, 50)), 4),
+        "p99_ms": round(float(np.percentile(timings, 99)), 4),
+        f"batch_{len(X)}_ms": round(batch_ms, 3),
+    }
+
+
+def tier_report(path: Path, test_pairs: list, y_test: np.ndarray, teacher_pred: np.ndarray) -> dict:
+    """MAE (cible simulée et écart au professeur), latence du régresseur et taille de l'artefact servi.
+
+    Les features des paires de test sont celles du transformeur de l'artefact, comme à l'API ;
+    seul le régresseur est chronométré.
+    """
+    loaded = load_artifact(path)
+    X_test = loaded.features.transform(test_pairs)
+    model = loaded.model
+    y_pred = model.predict(X_test)
+    return {
+        "artifact": str(path),
+        "artifact_bytes": os.path.getsize(path),
+        "mae": round(float(mean_absolute_error(y_test, y_pred)), 4),
+        "mae_vs_teacher": round(float(mean_absolute_error(teacher_pred, y_pred)), 4),
+        **latency_ms(model, X_test),
+    }
+
+
+def served_path(path: Path) -> Path:
+    """Export aplati .npz d'un régresseur historique s'il existe (chargé en priorité par l'API), sinon le pickle."""
+    flat = path.with_suffix(".npz")
+    return flat if flat.exists() else path
+
+
+def print_report(report: dict) -> None:
+    print(f"\n📊 {'niveau':<8} {'MAE':>7} {'Δ prof.':>8} {'p99 (ms)':>9} {'taille':>10}")
+    for tier, r in report["tiers"].items():
+        print(f"   {tier:<8} {r['mae']:>7.4f} {r['mae_vs_teacher']:>8.4f} {r['p99_ms']:>9.3f} "
+              f"{r['artifact_bytes'] / 1e6:>8.2f} Mo")
+
+
+# === DISTILLATION ===
+def main():
+    parser = argparse.ArgumentParser(description="Distille la forêt servie en un modèle compact (niveau « compact »).")
+    parser.add_argument("--teacher", type=Path, default=TEACHER_PATH)
+    parser.add_argument("--data", type=Path, default=DATA_PATH, help="professeurs du jeu de transfert")
+    parser.add_argument("--student", choices=sorted(STUDENTS), default="gbr")
+    parser.add_argument("--augment", type=int, default=AUGMENT_COPIES, help="copies bruitées par ligne")
+    parser.add_argument("--out", type=Path, default=COMPACT_MODEL_PATH)
+    parser.add_argument("--report", type=Path, default=REPORT_PATH)
+    parser.add_argument("--seed", type=int, default=SIMULATION_SEED)
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+    teacher = load_artifact(args.teacher)
+    print(f"🎓 Professeur : {type(teacher.model).__name__} ({teacher.source})")
+    # Features servies du professeur (similarité ajustée paire par paire s'il n'a pas de vectoriseur) :
+    # l'élève apprend sur les entrées qu'il recevra en production
+    features = teacher.features
+    pairs, X, y = transfer_frame(args.data, features, seed=args.seed)
+    train_idx, test_idx = train_test_split(np.arange(len(X)), test_size=0.2, random_state=42)
+    X_train, X_test, y_test = X.iloc[train_idx], X.iloc[test_idx], y[test_idx]
+    test_pairs = [pairs[i] for i in test_idx]
+    X_transfer = augment(X_train, args.augment, AUGMENT_NOISE, args.seed)
+    soft_targets = teacher.predict(X_transfer.to_numpy())
+    print(f"🧩 Jeu de transfert : {len(X_transfer)} lignes ({len(X_train)} réelles), {len(X_test)} de test")
+
+    student = STUDENTS[args.student](args.seed)
+    t0 = time.perf_counter()
+    student.fit(X_transfer.to_numpy(), soft_targets)
+    print(f"✅ Élève {type(student).__name__} ajusté en {time.perf_counter() - t0:.1f} s")
+
+    # Un seul artefact : transformeur du professeur + élève (aplati quand c'est possible)
+    regressor = student
+    if args.student != "hgb":
+        regressor = flatten_ensemble(student)
+        check_predictions(student, regressor, sample_inputs(regressor, 2000))
+    args.out.parent.mkdir(exist_ok=True)
+    joblib.dump(FeaturePipeline(features, regressor), args.out)
+
+    teacher_pred = teacher.predict(X_test.to_numpy())
+    report = {
+        "student": args.student,
+        "data": str(args.data),
+        "transfer_rows": len(X_transfer),
+        "test_rows": len(X_test),
+        "tiers": {
+            "full": tier_report(served_path(args.teacher), test_pairs, y_test, teacher_pred),
+            "compact": tier_report(args.out, test_pairs, y_test, teacher_pred),
+        },
+    }
+    print_report(report)
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n📦 Modèle compact (features + régresseur) sauvegardé dans : {args.out}")
+    print(f"📦 Rapport sauvegardé dans : {args.report}")
+    print("▶️ Pour le servir : MODEL_TIER=compact python serve.py")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+import argparse
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+
+import joblib
+
+from src.feature_pipeline import FeaturePipeline
+from src.feature_schema import FeatureSchema
+from src.tree_export import FlatTreeEnsemble
+
+# === CONFIGURATION ===
+REGISTRY_DIR = Path("models/registry")
+SCHEMA_FILE = "schema.json"
+VECTORIZER_FILE = "tfidf_vectorizer.pkl"
+# Par ordre de préférence : l'export aplati (src/tree_export.py) puis le pickle sklearn
+MODEL_FILES = ("model.npz", "model.pkl")
+# Niveaux de modèle : forêt complète ou élève distillé (src/model_distillation.py)
+MODEL_TIERS = ("full", "compact")
+
+
+# ==========================
+# 🔹 CHARGEMENT D'UN ARTEFACT
+# ==========================
+
+def load_model_file(path: Path):
+    path = Path(path)
+    if path.suffix == ".npz":
+        return FlatTreeEnsemble.load(path)
+    return joblib.load(path)
+
+
+def as_pipeline(model, vectorizer_path: Path = None) -> FeaturePipeline:
+    """Artefact chargé -> FeaturePipeline ; un régresseur seul est associé aux features historiques de l'API."""
+    if isinstance(model, FeaturePipeline):
+        return model
+    vectorizer = None
+    if vectorizer_path is not None and Path(vectorizer_path).exists():
+        vectorizer = joblib.load(vectorizer_path)
+    return FeaturePipeline.wrap(model, vectorizer)
+
+
+class LoadedModel:
+    """Modèle prêt à servir : transformeur de features + régresseur (FeaturePipeline) d'une version."""
+
+    def __init__(self, version: str, pipeline: FeaturePipeline, source: str = "", tier: str = "full"):
+        self.version = version
+        self.pipeline = pipeline
+        self.features = pipeline.features
+        self.model = pipeline.regressor
+        self.schema = pipeline.features.schema
+        self.vectorizer = pipeline.features.vectorizer
+        self.source = source
+        self.tier = tier
+
+    def predict(self, X):
+        """Prédiction sur une matrice déjà construite par `self.features`."""
+        return self.model.predict(X)
+
+    def predict_records(self, records):
+        """Prédiction sur du JSON brut `{"professor": ..., "course": ...}`."""
+        return self.pipeline.predict(records)
+
+
+def legacy_vectorizer_path(model_path: Path) -> Path:
+    """Vectoriseur propre à un régresseur historique : `<nom du modèle>.tfidf_vectorizer.pkl`.
+
+    Un régresseur sans ce fichier a été entraîné avec la similarité ajustée paire par paire :
+    il n'est jamais associé au vectoriseur d'un autre entraînement.
+    """
+    model_path = Path(model_path)
+    return model_path.with_name(f"{model_path.stem}.{VECTORIZER_FILE}")
+
+
+def load_artifact(model_path: Path, version: str = "legacy", tier: str = "full") -> LoadedModel:
+    """Charge un modèle hors registre (chemins historiques de l'API)."""
+    pipeline = as_pipeline(load_model_file(model_path), legacy_vectorizer_path(model_path))
+    return LoadedModel(version, pipeline, source=str(model_path), tier=tier)
+
+
+def resolve_model(registry, tier: str, legacy_path: Path, version: str = None) -> LoadedModel:
+    """Modèle servi par l'API : version du registre (la plus récente du niveau par défaut), sinon
+    l'artefact historique `legacy_path` (son export aplati .npz s'il existe), version "legacy-<niveau>"."""
+    if version != "legacy" and (version is not None or registry.latest(tier) is not None):
+        return registry.load(version, tier=tier)
+    legacy_path = Path(legacy_path)
+    flat_path = legacy_path.with_suffix(".npz")
+    return load_artifact(flat_path if flat_path.exists() else legacy_path, version=f"legacy-{tier}", tier=tier)
+
+
+# ==========================
+# 🔹 REGISTRE DES VERSIONS
+# ==========================
+
+class ModelRegistry:
+    """Versions de modèles sous `root/<version>/` : model.npz|model.pkl, schema.json, vectoriseur optionnel.
+
+    schema.json (le « sidecar ») fige l'ordre des features : il est vérifié à chaque chargement.
+    Les versions sont triées par nom ; le nom par défaut est un horodatage UTC.
+    Chaque version appartient à un niveau (`tier` du sidecar, "full" par défaut).
+    """
+
+    def __init__(self, root: Path = REGISTRY_DIR):
+        self.root = Path(root)
+
+    def versions(self) -> list:
+        if not self.root.exists():
+            return []
+        return sorted(
+            p.name for p in self.root.iterdir()
+            if not p.name.startswith(".") and (p / SCHEMA_FILE).exists()
+        )
+
+    def tier_of(self, version: str) -> str:
+        with open(self.root / version / SCHEMA_FILE, encoding="utf-8") as f:
+            return json.load(f).get("tier", "full")
+
+    def latest(self, tier: str = None):
+        """Version la plus récente, éventuellement restreinte à un niveau."""
+        versions = self.versions()
+        if tier is not None:
+            versions = [v for v in versions if self.tier_of(v) == tier]
+        return versions[-1] if versions else None
+
+    def register(self, model_path: Path, vectorizer_path: Path = None, version: str = None,
+                 tier: str = "full") -> str:
+        """Copie un modèle (et son vectoriseur) dans une nouvelle version et écrit son schéma."""
+        model_path = Path(model_path)
+        if tier not in MODEL_TIERS:
+            raise ValueError(f"Niveau inconnu : {tier} (attendu : {', '.join(MODEL_TIERS)})")
+        model_file = "model.npz" if model_path.suffix == ".npz" else "model.pkl"
+        version = version or datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
+        target = self.root / version
+        if target.exists():
+            raise FileExistsError(f"La version {version} existe déjà")
+
+        schema = FeatureSchema.from_model(load_model_file(model_path))
+        self.root.mkdir(parents=True, exist_ok=True)
+        # Écrit dans un dossier temporaire puis renomme : une version n'est jamais visible à moitié
+        tmp = Path(tempfile.mkdtemp(prefix=f".{version}-", dir=self.root))
+        try:
+            shutil.copy2(model_path, tmp / model_file)
+            if vectorizer_path is not None:
+                shutil.copy2(vectorizer_path, tmp / VECTORIZER_FILE)
+            with open(tmp / SCHEMA_FILE, "w", encoding="utf-8") as f:
+                json.dump({
+                    "version": version,
+                    "tier": tier,
+                    "model_file": model_file,
+                    "feature_names": schema.feature_names,
+                    "source": str(model_path),
+                    "created_at": datetime.now(timezone.utc).isoformat(),
+                }, f, ensure_ascii=False, indent=2)
+            os.rename(tmp, target)
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        return version
+
+    def load(self, version: str = None, tier: str = None) -> LoadedModel:
+        """Charge `version`, ou la plus récente (du niveau `tier` s'il est donné)."""
+        version = version or self.latest(tier)
+        if version is None:
+            raise FileNotFoundError(f"Aucune version dans le registre {self.root}")
+        directory = self.root / version
+        with open(directory / SCHEMA_FILE, encoding="utf-8") as f:
+            sidecar = json.load(f)
+
+        model_file = sidecar.get("model_file")
+        model_path = directory / model_file if model_file else None
+        if model_path is None or not model_path.exists():
+            model_path = next((directory / name for name in MODEL_FILES if (directory / name).exists()), None)
+        if model_path is None:
+            raise FileNotFoundError(f"Aucun fichier de modèle dans {directory}")
+        model = load_model_file(model_path)
+
+        schema = FeatureSchema(sidecar["feature_names"])
+        model_names = getattr(model, "feature_names_in_", None)
+        if model_names is not None and list(map(str, model_names)) != schema.feature_names:
+            raise ValueError(f"Version {version} : les features du modèle ne correspondent pas à {SCHEMA_FILE}")
+
+        # Un FeaturePipeline embarque son vectoriseur ; celui du dossier sert aux régresseurs seuls
+        pipeline = as_pipeline(model, directory / VECTORIZER_FILE)
+        return LoadedModel(version, pipeline, source=str(model_path), tier=sidecar.get("tier", "full"))
+
+
+# === LIGNE DE COMMANDE ===
+def main():
+    parser = argparse.ArgumentParser(description="Registre des modèles servis par l'API.")
+    parser.add_argument("--root", type=Path, default=REGISTRY_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+    reg = sub.add_parser("register", help="ajoute une version")
+    reg.add_argument("--model", type=Path, required=True)
+    reg.add_argument("--vectorizer", type=Path, default=None)
+    reg.add_argument("--version", default=None)
+    reg.add_argument("--tier", choices=MODEL_TIERS, default="full")
+    sub.add_parser("list", help="liste les versions")
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.root)
+    if args.command == "register":
+        version = registry.register(args.model, args.vectorizer, args.version, args.tier)
+        print(f"📦 Version {version} ({args.tier}) enregistrée dans {registry.root}")
+    else:
+        for version in registry.versions():
+            print(f"{version}\t{registry.tier_of(version)}")
+
+
+if __name__ == "__main__":
+    main()
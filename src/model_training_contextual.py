@@ -1,3 +1,7 @@
+import argparse
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import numpy as np
 from pathlib import Path
@@ -6,98 +10,251 @@ from sklearn.ensemble import GradientBoostingRegressor
 from sklearn.metrics import mean_absolute_error, r2_score
 import joblib
 
+from src.data_loader import iter_professor_chunks, iter_professors
+from src.feature_cache import payload_hash
+from src.feature_pipeline import FeaturePipeline, FeatureTransformer, default_feature_names
+from src.feature_store import STORE_DIR, FeatureStore, feature_config_hash, file_fingerprint, vectorizer_fingerprint
+from src.hyperparameter_search import N_CONFIGS, N_FOLDS, SEARCH_LOG_PATH, successive_halving
+from src.parallel import ordered_map
 from src.smart_predictor import (
-    compute_similarity,
-    compute_degree_score,
-    compute_prestige_score,
-    extract_domain_from_text,
+    build_profile_text,
     DOMAIN_KEYWORDS,
+    fit_vectorizer,
+    get_vectorizer,
+    set_vectorizer,
 )
 
 # === CONFIGURATION ===
 DATA_PATH = Path("data/data_train_test.json")
 MODEL_PATH = Path("models/model_contextual_realistic.pkl")
+VECTORIZER_CORPUS_PATH = Path("data/data_train.json")
+SIMULATION_CHUNK_SIZE = 2000  # professeurs par bloc (unité de parallélisme et de graine)
+SIMULATION_SEED = 42
 
 # === GÉNÉRATION DE DONNÉES SYNTHÉTIQUES ===
-def simulate_course_pairings(df: pd.DataFrame):
-    """Crée un dataset réaliste (professeur x cours à venir) avec des notes simulées."""
-    simulated = []
-    for _, prof in df.iterrows():
-        base = prof.to_dict()
-        profile_text = " ".join([
-            base.get("description", ""),
-            " ".join(d.get("title", "") for d in base.get("diplomas", [])),
-            " ".join(e.get("title", "") for e in base.get("experiences", []))
-        ])
-        prof_domain = extract_domain_from_text(profile_text)
-
-        for domain_name, keywords in DOMAIN_KEYWORDS.items():
-            course_text = " ".join(keywords)
-            sim = compute_similarity(profile_text, course_text)
-
-            # Note simulée : élevée si le domaine correspond, sinon basse
-            base_note = 4.6 if domain_name == prof_domain else 2.7
-            note = base_note + np.random.normal(0, 0.3)
-            note = max(1.0, min(5.0, note))
-
-            simulated.append({
-                "professorId": base.get("professorId"),
-                "prof_domain": prof_domain,
-                "course_domain": domain_name,
-                "similarity": sim,
-                "degree_score": compute_degree_score(base.get("diplomas", [])),
-                "prestige_score": compute_prestige_score(base.get("experiences", [])),
-                "n_experiences": len(base.get("experiences", [])),
-                "n_diplomas": len(base.get("diplomas", [])),
-                "avg_stars": np.mean([c.get("numberOfStars", 4.0) for c in base.get("pastCourses", [])]),
-                "target": round(note, 2)
-            })
-    return pd.DataFrame(simulated)
+def training_transformer(vectorizer=None) -> FeatureTransformer:
+    """Transformeur des modèles entraînés ici (profil sans les cours passés), sauvegardé avec eux."""
+    return FeatureTransformer(vectorizer, feature_names=default_feature_names(), include_past_courses=False)
+
+
+def domain_courses() -> list:
+    """Un cours fictif par domaine : ses mots-clés."""
+    return [{"title": "", "description": " ".join(keywords)} for keywords in DOMAIN_KEYWORDS.values()]
+
+
+def simulate_notes(prof_domains, rng: np.random.Generator) -> np.ndarray:
+    """Notes simulées (n_prof x n_domaines) : élevées si le domaine correspond, sinon basses."""
+    course_domains = np.array(list(DOMAIN_KEYWORDS), dtype=object)
+    base_note = np.where(np.asarray(prof_domains, dtype=object)[:, None] == course_domains[None, :], 4.6, 2.7)
+    return np.clip(base_note + rng.normal(0, 0.3, size=base_note.shape), 1.0, 5.0)
+
+
+def _simulate_chunk(records: list, seed_seq: np.random.SeedSequence) -> dict:
+    """Paires (professeur x domaine) d'un bloc de professeurs, features du transformeur partagé."""
+    transformer = training_transformer(get_vectorizer())
+    n_dom = len(DOMAIN_KEYWORDS)
+
+    # Features ne dépendant que du professeur : une fois par professeur ; cours de domaine découpés
+    # une fois par bloc, similarités en un produit creux (profils x domaines)
+    prof_features = transformer.professor_features_batch(records)
+    X = transformer.transform_grid(prof_features, domain_courses())
+
+    rng = np.random.default_rng(seed_seq)
+    note = simulate_notes([f["prof_domain"] for f in prof_features], rng)
+
+    columns = {name: X[:, i] for i, name in enumerate(transformer.feature_names)}
+    columns["professorId"] = np.repeat(np.array([p.get("professorId") for p in records], dtype=object), n_dom)
+    columns["target"] = np.round(note, 2).ravel()
+    return columns
+
+
+def _simulate_seeded(item: tuple) -> dict:
+    """`(bloc, graine)` -> `_simulate_chunk` (tâche du pool de `ordered_map`)."""
+    return _simulate_chunk(*item)
+
+
+def _init_worker(vectorizer) -> None:
+    set_vectorizer(vectorizer)
+
+
+def simulate_course_pairings(df: pd.DataFrame, n_jobs: int = 1, seed: int = SIMULATION_SEED,
+                             chunk_size: int = SIMULATION_CHUNK_SIZE):
+    """Crée un dataset réaliste (professeur x cours à venir) avec des notes simulées.
+
+    Les professeurs sont traités par blocs de `chunk_size`, chacun avec sa propre graine dérivée
+    de `seed` : le résultat est identique quel que soit `n_jobs` (> 1 : pool de processus).
+    """
+    records = df.to_dict("records") if isinstance(df, pd.DataFrame) else list(df)
+    chunks = (records[i:i + chunk_size] for i in range(0, len(records), chunk_size))
+    return simulate_course_pairings_stream(chunks, n_jobs=n_jobs, seed=seed)
+
+
+def simulate_course_pairings_stream(chunks, n_jobs: int = 1, seed: int = SIMULATION_SEED):
+    """Variante en flux de `simulate_course_pairings` : consomme un itérable de blocs d'enregistrements.
+
+    Seules les colonnes numériques générées sont conservées ; au plus 2 x `n_jobs` blocs bruts
+    sont en mémoire à la fois.
+    """
+    seed_seq = np.random.SeedSequence(seed)
+    # spawn(1) successifs = mêmes graines qu'un spawn(n) unique : résultat indépendant du découpage en flux
+    seeded = ((chunk, seed_seq.spawn(1)[0]) for chunk in chunks)
+
+    if n_jobs > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                                 initargs=(get_vectorizer(),)) as pool:
+            parts = list(ordered_map(pool, _simulate_seeded, seeded, max_in_flight=2 * n_jobs))
+    else:
+        parts = [_simulate_chunk(chunk, s) for chunk, s in seeded]
+
+    if not parts:
+        return pd.DataFrame()
+    return pd.DataFrame({col: np.concatenate([part[col] for part in parts]) for col in parts[0]})
+
+
+# === CACHE DE FEATURES (INCRÉMENTAL) ===
+def build_synthetic_dataset(data_path: Path, n_jobs: int = 1, seed: int = SIMULATION_SEED,
+                            store_dir: Path = STORE_DIR, chunk_size: int = SIMULATION_CHUNK_SIZE):
+    """Dataset synthétique de `data_path`, relu depuis le cache de features si possible.
+
+    - fichier source inchangé (taille, date) : chargement direct du cache ;
+    - sinon, seuls les professeurs nouveaux ou modifiés (hash de contenu inconnu) sont recalculés.
+    Le cache est propre à une configuration (référentiels, FEATURE_VERSION, vectoriseur, graine).
+    Les lignes d'un nouveau bloc ont une graine dérivée du contenu du bloc : reproductible.
+    """
+    key = feature_config_hash({"seed": seed, "vectorizer": vectorizer_fingerprint(get_vectorizer())})
+    store = FeatureStore(store_dir, key)
+    fingerprint = file_fingerprint(data_path)
+    cached = store.load()
+    if cached is not None and cached["fingerprint"] == fingerprint:
+        print(f"⚡ Features relues depuis le cache : {store.path}")
+        return pd.DataFrame(cached["columns"])
+
+    n_dom = len(DOMAIN_KEYWORDS)
+    known = {}
+    if cached is not None:
+        known = {h: i for i, h in enumerate(cached["record_hashes"])}
+
+    # Parcours en flux : on ne garde que les hash, et les enregistrements à recalculer par blocs
+    order, new_hash_blocks = [], []
+
+    def new_chunks():
+        pending, pending_hashes, seen = [], [], set()
+        for record in iter_professors(data_path):
+            h = payload_hash(record)
+            order.append(h)
+            if h in known or h in seen:
+                continue
+            seen.add(h)
+            pending.append(record)
+            pending_hashes.append(h)
+            if len(pending) == chunk_size:
+                yield pending, pending_hashes
+                pending, pending_hashes = [], []
+        if pending:
+            yield pending, pending_hashes
+
+    def seeded():
+        for chunk, hashes in new_chunks():
+            new_hash_blocks.append(hashes)
+            content = hashlib.sha256("".join(hashes).encode()).digest()
+            yield chunk, np.random.SeedSequence([seed, int.from_bytes(content[:8], "little")])
+
+    if n_jobs > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                                 initargs=(get_vectorizer(),)) as pool:
+            new_parts = list(ordered_map(pool, _simulate_seeded, seeded(), max_in_flight=2 * n_jobs))
+    else:
+        new_parts = [_simulate_chunk(chunk, s) for chunk, s in seeded()]
+    new_hashes = [h for block in new_hash_blocks for h in block]
+    print(f"🧮 Features : {len(new_hashes)} professeurs recalculés, {len(order) - len(new_hashes)} relus du cache")
+
+    # Réserve = anciennes lignes + nouvelles ; on en extrait les lignes dans l'ordre courant des données
+    parts = ([cached["columns"]] if cached is not None else []) + new_parts
+    if not parts or not order:
+        return pd.DataFrame()
+    pool_columns = {col: np.concatenate([part[col] for part in parts]) for col in parts[0]}
+    offset = len(known)
+    position = dict(known)
+    position.update({h: offset + i for i, h in enumerate(new_hashes)})
+    record_pos = np.array([position[h] for h in order], dtype=np.int64)
+    rows = (record_pos[:, None] * n_dom + np.arange(n_dom)).ravel()
+    columns = {col: values[rows] for col, values in pool_columns.items()}
+
+    store.save(columns, order, n_dom, fingerprint)
+    return pd.DataFrame(columns)
 
 
 # === ENTRAÎNEMENT DU MODÈLE ===
+def build_model(**params) -> GradientBoostingRegressor:
+    """Régresseur de production ; `params` surcharge la configuration (ex. benchmarks)."""
+    config = {"n_estimators": 400, "learning_rate": 0.05, "max_depth": 5, "random_state": 42}
+    config.update(params)
+    return GradientBoostingRegressor(**config)
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Entraîne le modèle contextuel réaliste.")
+    parser.add_argument("--jobs", type=int, default=1, help="processus pour la génération synthétique et la recherche")
+    parser.add_argument("--seed", type=int, default=SIMULATION_SEED)
+    parser.add_argument("--no-feature-store", action="store_true", help="recalcule toutes les features")
+    parser.add_argument("--data", type=Path, default=DATA_PATH,
+                        help="professeurs d'entraînement (JSON ou JSONL, ex. data/cleaned/professors.jsonl)")
+    parser.add_argument("--corpus", type=Path, default=VECTORIZER_CORPUS_PATH, help="corpus du vectoriseur TF-IDF")
+    parser.add_argument("--search", action="store_true",
+                        help="recherche d'hyperparamètres (successive halving) avant l'entraînement final")
+    parser.add_argument("--trials", type=int, default=N_CONFIGS, help="configurations tirées pour la recherche")
+    parser.add_argument("--folds", type=int, default=N_FOLDS)
+    parser.add_argument("--search-log", type=Path, default=SEARCH_LOG_PATH, help="journal JSONL des essais")
+    args = parser.parse_args()
+
     print("🚀 Entraînement du modèle contextuel réaliste...")
 
-    # Chargement du dataset enrichi
-    df = pd.read_json(DATA_PATH)
-    print(f"✅ Dataset chargé ({len(df)} profils enseignants)")
+    # Vectoriseur TF-IDF ajusté une fois sur le corpus des profils (lu en flux)
+    vectorizer = fit_vectorizer(build_profile_text(p) for p in iter_professors(args.corpus))
+    set_vectorizer(vectorizer)
+    print(f"🔤 Vectoriseur TF-IDF ajusté ({len(vectorizer.vocabulary_)} termes)")
 
-    # Génération de données synthétiques réalistes
-    synthetic_df = simulate_course_pairings(df)
+    # Génération de données synthétiques réalistes, bloc par bloc depuis le dataset enrichi
+    if args.no_feature_store:
+        chunks = iter_professor_chunks(args.data, SIMULATION_CHUNK_SIZE)
+        synthetic_df = simulate_course_pairings_stream(chunks, n_jobs=args.jobs, seed=args.seed)
+    else:
+        synthetic_df = build_synthetic_dataset(args.data, n_jobs=args.jobs, seed=args.seed)
+    print(f"✅ Dataset lu ({synthetic_df.shape[0] // len(DOMAIN_KEYWORDS)} profils enseignants)")
     print(f"🧩 Données générées : {synthetic_df.shape[0]} paires prof–cours")
 
-    # One-hot encoding des domaines
-    synthetic_df = pd.get_dummies(synthetic_df, columns=["prof_domain", "course_domain"])
-
-    # Définition des features et de la cible
-    X = synthetic_df.drop(columns=["target", "professorId"])
+    # Features (one-hot des domaines comprises) dans l'ordre du transformeur, et cible
+    transformer = training_transformer(vectorizer)
+    X = synthetic_df[transformer.feature_names]
     y = synthetic_df["target"]
 
     # Split train/test
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
-    # Modèle
-    model = GradientBoostingRegressor(
-        n_estimators=400,
-        learning_rate=0.05,
-        max_depth=5,
-        random_state=42
-    )
+    # Modèle (recherche sur le split d'entraînement uniquement, features déjà calculées)
+    params = {}
+    if args.search:
+        # Les lignes sont rangées par professeur (un bloc de domaines chacun) : groupes des plis
+        groups = X_train.index.to_numpy() // len(DOMAIN_KEYWORDS)
+        best = successive_halving(X_train, y_train, groups, build_model, n_configs=args.trials,
+                                  n_folds=args.folds, n_jobs=args.jobs, seed=args.seed, log_path=args.search_log)
+        params = best["params"]
+    model = build_model(**params)
 
-    # Entraînement
-    model.fit(X_train, y_train)
-    y_pred = model.predict(X_test)
+    # Entraînement (sur la matrice : les noms de colonnes sont portés par le transformeur)
+    model.fit(X_train.to_numpy(), y_train)
+    y_pred = model.predict(X_test.to_numpy())
 
     # Évaluation
     mae = mean_absolute_error(y_test, y_pred)
     r2 = r2_score(y_test, y_pred)
     print(f"✅ Entraînement terminé : MAE={mae:.3f}, R²={r2:.3f}")
 
-    # Sauvegarde
+    # Sauvegarde : transformeur (vectoriseur compris) + régresseur dans un seul artefact.
+    # Rien n'est écrit dans models/tfidf_vectorizer.pkl : un autre modèle ne doit pas le récupérer.
     MODEL_PATH.parent.mkdir(exist_ok=True)
-    joblib.dump(model, MODEL_PATH)
-    print(f"📦 Modèle sauvegardé dans : {MODEL_PATH.resolve()}")
+    joblib.dump(FeaturePipeline(transformer, model), MODEL_PATH)
+    print(f"📦 Modèle (features + vectoriseur + régresseur) sauvegardé dans : {MODEL_PATH.resolve()}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,20 @@
+from collections import deque
+
+
+# ==========================
+# 🔹 POOL DE PROCESSUS
+# ==========================
+
+def ordered_map(pool, fn, items, max_in_flight: int):
+    """`pool.map` dans l'ordre, sans lire plus de `max_in_flight` blocs d'avance.
+
+    Partagé par les traitements par blocs (nettoyage, génération synthétique, notation hors ligne) :
+    `items` est consommé au fil de l'eau, la mémoire reste bornée quel que soit le nombre de blocs.
+    """
+    pending = deque()
+    for item in items:
+        pending.append(pool.submit(fn, item))
+        if len(pending) >= max_in_flight:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
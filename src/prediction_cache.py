@@ -0,0 +1,129 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from src.feature_cache import payload_hash
+
+# Surcoût approximatif d'une entrée (nœud de l'OrderedDict + tuple), en octets
+ENTRY_OVERHEAD_BYTES = 200
+
+
+# ==========================
+# 🔹 CACHE DES PRÉDICTIONS
+# ==========================
+
+class _InFlight:
+    __slots__ = ("event", "value", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class PredictionCache:
+    """Cache LRU + TTL des prédictions, indexé par le hash de la requête et la version du modèle.
+
+    Les requêtes identiques simultanées partagent un seul calcul : la première calcule,
+    les suivantes attendent son résultat (ou son erreur, qui n'est pas mise en cache).
+    """
+
+    def __init__(self, maxsize: int = 10_000, ttl_s: float = 300.0, clock=time.monotonic):
+        if maxsize < 1:
+            raise ValueError("maxsize doit être >= 1")
+        self.maxsize = maxsize
+        self.ttl_s = ttl_s
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.expired = 0
+        self._entries = OrderedDict()  # clé -> (expiration, valeur)
+        self._in_flight = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(payload: dict, model_version: str) -> str:
+        return f"{model_version}:{payload_hash(payload)}"
+
+    def get_or_compute(self, key: str, compute):
+        """Renvoie `(valeur, statut)` avec statut `hit`, `coalesced` ou `miss` (calculée via `compute()`)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > self.clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1], "hit"
+                self._remove(key)
+                self.expired += 1
+
+            pending = self._in_flight.get(key)
+            if pending is None:
+                pending = self._in_flight[key] = _InFlight()
+                owner = True
+                self.misses += 1
+            else:
+                owner = False
+                self.coalesced += 1
+
+        if not owner:
+            pending.event.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.value, "coalesced"
+
+        try:
+            pending.value = compute()
+        except BaseException as e:
+            pending.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+                if pending.error is None:
+                    self._store(key, pending.value)
+            pending.event.set()
+        return pending.value, "miss"
+
+    def clear(self) -> None:
+        """Vide le cache (rechargement du modèle) ; les calculs en cours se terminent normalement."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "expired": self.expired,
+                # Les requêtes coalescées n'ont pas appelé le modèle : elles comptent comme des hits
+                "hit_rate": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_s": self.ttl_s,
+                "in_flight": len(self._in_flight),
+                "approx_bytes": self._bytes,
+            }
+
+    # Appelées sous verrou
+    def _store(self, key: str, value) -> None:
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (self.clock() + self.ttl_s, value)
+        self._bytes += self._entry_bytes(key, value)
+        while len(self._entries) > self.maxsize:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: str) -> None:
+        _, value = self._entries.pop(key)
+        self._bytes -= self._entry_bytes(key, value)
+
+    @staticmethod
+    def _entry_bytes(key: str, value) -> int:
+        return sys.getsizeof(key) + sys.getsizeof(value) + ENTRY_OVERHEAD_BYTES
@@ -0,0 +1,211 @@
+import argparse
+import json
+import weakref
+from pathlib import Path
+
+import numpy as np
+import scipy.sparse as sp
+
+from src.data_loader import iter_professors
+from src.feature_pipeline import PROFESSOR_COLUMNS
+from src.feature_store import vectorizer_fingerprint
+from src.model_registry import load_artifact
+from src.smart_predictor import (
+    DOMAIN_KEYWORDS,
+    compute_professor_features,
+    get_vectorizer,
+    set_vectorizer,
+)
+from src.text_document import NormalizedDocument, tfidf_matrix
+
+# === CONFIGURATION ===
+DATA_PATH = Path("data/data_train.json")
+INDEX_DIR = Path("models/professor_index")
+MODEL_PATH = Path("models/model_contextual_randomforest.pkl")
+
+
+# ==========================
+# 🔹 CONSTRUCTION DE L'INDEX (HORS LIGNE)
+# ==========================
+
+def build_index(records, out_dir: Path = INDEX_DIR, include_past_courses: bool = True) -> int:
+    """Précalcule les features de chaque professeur et les écrit en fichiers .npy mappables.
+
+    La matrice TF-IDF (CSR) est stockée en trois tableaux (data / indices / indptr).
+    Nécessite le vectoriseur persistant : les vecteurs doivent être comparables à ceux des cours.
+    `include_past_courses` doit être celui du transformeur du modèle servi (src/feature_pipeline.py).
+    """
+    vectorizer = get_vectorizer()
+    if vectorizer is None:
+        raise RuntimeError("Vectoriseur TF-IDF non chargé (lancer l'entraînement pour le créer)")
+
+    domains = list(DOMAIN_KEYWORDS)
+    domain_codes = {d: i for i, d in enumerate(domains)}
+    rows, degree, prestige, avg_stars, n_experiences, n_diplomas, domain, names = [], [], [], [], [], [], [], []
+    for record in records:
+        feats = compute_professor_features(record, include_past_courses=include_past_courses)
+        rows.append(feats["tfidf"])
+        degree.append(feats["degree_score"])
+        prestige.append(feats["prestige_score"])
+        avg_stars.append(feats["avg_stars"])
+        n_experiences.append(feats["n_experiences"])
+        n_diplomas.append(feats["n_diplomas"])
+        domain.append(domain_codes.get(feats["prof_domain"], -1))
+        names.append({
+            "fistname": record.get("fistname", ""),
+            "lastname": record.get("lastname", ""),
+            "city": record.get("city", ""),
+        })
+
+    n_features = len(vectorizer.vocabulary_)
+    tfidf = sp.vstack(rows, format="csr") if rows else sp.csr_matrix((0, n_features))
+    tfidf.sort_indices()
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    np.save(out_dir / "tfidf_data.npy", tfidf.data.astype(np.float32))
+    np.save(out_dir / "tfidf_indices.npy", tfidf.indices.astype(np.int32))
+    np.save(out_dir / "tfidf_indptr.npy", tfidf.indptr.astype(np.int64))
+    np.save(out_dir / "degree_score.npy", np.asarray(degree, dtype=np.float32))
+    np.save(out_dir / "prestige_score.npy", np.asarray(prestige, dtype=np.float32))
+    np.save(out_dir / "avg_stars.npy", np.asarray(avg_stars, dtype=np.float32))
+    np.save(out_dir / "n_experiences.npy", np.asarray(n_experiences, dtype=np.float32))
+    np.save(out_dir / "n_diplomas.npy", np.asarray(n_diplomas, dtype=np.float32))
+    np.save(out_dir / "prof_domain.npy", np.asarray(domain, dtype=np.int16))
+    with open(out_dir / "meta.json", "w", encoding="utf-8") as f:
+        json.dump({
+            "n_professors": len(names),
+            "n_terms": n_features,
+            "vectorizer": vectorizer_fingerprint(vectorizer),
+            "domains": domains,
+            "include_past_courses": include_past_courses,
+            "professors": names,
+        }, f, ensure_ascii=False)
+    return len(names)
+
+
+# ==========================
+# 🔹 INDEX EN LECTURE
+# ==========================
+
+class ProfessorIndex:
+    """Index des professeurs chargé en mémoire mappée (les pages sont lues à la demande)."""
+
+    def __init__(self, tfidf, degree_score, prestige_score, avg_stars, prof_domain, domains, professors,
+                 n_experiences=None, n_diplomas=None, include_past_courses: bool = True,
+                 vectorizer_fingerprint: str = None):
+        self.tfidf = tfidf
+        self.degree_score = degree_score
+        self.prestige_score = prestige_score
+        self.avg_stars = avg_stars
+        self.prof_domain = prof_domain
+        self.domains = domains
+        self.professors = professors
+        # Absents des index construits avant leur ajout (None)
+        self.n_experiences = n_experiences
+        self.n_diplomas = n_diplomas
+        self.include_past_courses = include_past_courses
+        # Empreinte (vocabulaire + IDF) du vectoriseur de construction ; None : index antérieur à son ajout
+        self.vectorizer_fingerprint = vectorizer_fingerprint
+        self._vectorizer_checks = weakref.WeakKeyDictionary()  # vectoriseur -> compatible (calculé une fois)
+
+    def __len__(self) -> int:
+        return self.tfidf.shape[0]
+
+    @classmethod
+    def load(cls, index_dir: Path = INDEX_DIR, mmap: bool = True):
+        index_dir = Path(index_dir)
+        mode = "r" if mmap else None
+        with open(index_dir / "meta.json", encoding="utf-8") as f:
+            meta = json.load(f)
+
+        def optional(name):
+            path = index_dir / f"{name}.npy"
+            return np.load(path, mmap_mode=mode) if path.exists() else None
+        tfidf = sp.csr_matrix(
+            (
+                np.load(index_dir / "tfidf_data.npy", mmap_mode=mode),
+                np.load(index_dir / "tfidf_indices.npy", mmap_mode=mode),
+                np.load(index_dir / "tfidf_indptr.npy", mmap_mode=mode),
+            ),
+            shape=(meta["n_professors"], meta["n_terms"]),
+            copy=False,
+        )
+        return cls(
+            tfidf=tfidf,
+            degree_score=np.load(index_dir / "degree_score.npy", mmap_mode=mode),
+            prestige_score=np.load(index_dir / "prestige_score.npy", mmap_mode=mode),
+            avg_stars=np.load(index_dir / "avg_stars.npy", mmap_mode=mode),
+            prof_domain=np.load(index_dir / "prof_domain.npy", mmap_mode=mode),
+            domains=meta["domains"],
+            professors=meta["professors"],
+            n_experiences=optional("n_experiences"),
+            n_diplomas=optional("n_diplomas"),
+            include_past_courses=meta.get("include_past_courses", True),
+            vectorizer_fingerprint=meta.get("vectorizer"),
+        )
+
+    def matches_vectorizer(self, vectorizer) -> bool:
+        """Vrai si l'index a été construit avec ce vectoriseur (même vocabulaire et mêmes IDF).
+
+        La taille du vocabulaire ne suffit pas : un vectoriseur réajusté sur un autre corpus peut
+        avoir autant de termes. L'empreinte n'est calculée qu'une fois par vectoriseur.
+        """
+        matches = self._vectorizer_checks.get(vectorizer)
+        if matches is None:
+            matches = (
+                self.vectorizer_fingerprint is not None
+                and len(vectorizer.vocabulary_) == self.tfidf.shape[1]
+                and vectorizer_fingerprint(vectorizer) == self.vectorizer_fingerprint
+            )
+            self._vectorizer_checks[vectorizer] = matches
+        return matches
+
+    def incompatibility(self, features) -> str | None:
+        """Raison pour laquelle l'index ne peut pas servir le transformeur `features` (None : compatible)."""
+        rebuild = "le reconstruire avec le modèle servi (python -m src.professor_index --model ...)"
+        if features.vectorizer is None:
+            return "Le modèle servi n'a pas de vectoriseur TF-IDF : l'index des professeurs ne s'applique pas."
+        if not self.matches_vectorizer(features.vectorizer):
+            return f"Index des professeurs construit avec un autre vectoriseur : {rebuild}."
+        if self.include_past_courses != features.include_past_courses:
+            return f"Index des professeurs construit avec un autre texte de profil : {rebuild}."
+        missing = [name for name in PROFESSOR_COLUMNS if name in features.schema.index and getattr(self, name) is None]
+        if missing:
+            return f"Index des professeurs sans {', '.join(missing)} : {rebuild}."
+        return None
+
+    def similarities(self, course, vectorizer=None) -> np.ndarray:
+        """Similarité de chaque professeur avec le cours (texte ou NormalizedDocument) :
+        un produit matrice creuse x vecteur."""
+        if vectorizer is None:
+            vectorizer = get_vectorizer()
+        if vectorizer is None:
+            raise RuntimeError("Vectoriseur TF-IDF non chargé")
+        if not self.matches_vectorizer(vectorizer):
+            raise RuntimeError("L'index a été construit avec un autre vectoriseur : le reconstruire")
+        if not isinstance(course, NormalizedDocument):
+            course = NormalizedDocument(course or "")
+        course_vec = tfidf_matrix([course], vectorizer)
+        return np.asarray((self.tfidf @ course_vec.T).toarray(), dtype=float).ravel()
+
+
+# === CONSTRUCTION ===
+def main():
+    parser = argparse.ArgumentParser(description="Construit l'index des professeurs pour /api/match/professors.")
+    parser.add_argument("--data", type=Path, default=DATA_PATH)
+    parser.add_argument("--out", type=Path, default=INDEX_DIR)
+    parser.add_argument("--model", type=Path, default=MODEL_PATH,
+                        help="modèle servi : son vectoriseur et son texte de profil sont repris")
+    args = parser.parse_args()
+
+    features = load_artifact(args.model).features
+    if features.vectorizer is None:
+        raise SystemExit(f"❌ {args.model} n'a pas de vectoriseur TF-IDF (similarité ajustée paire par paire)")
+    set_vectorizer(features.vectorizer)
+    n = build_index(iter_professors(args.data), args.out, include_past_courses=features.include_past_courses)
+    print(f"📦 Index de {n} professeurs sauvegardé dans : {args.out}")
+
+
+if __name__ == "__main__":
+    main()
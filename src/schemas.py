@@ -0,0 +1,76 @@
+import json
+
+from pydantic import BaseModel, Field, ValidationError
+
+
+# ==========================
+# 🔹 SCHÉMAS DE DONNÉES DE L'API
+# ==========================
+# Partagés par l'API (app.py), le nettoyage des données (src/data_cleaning.py)
+# et la notation hors ligne (src/batch_scoring.py)
+
+class Diploma(BaseModel):
+    level: str
+    title: str
+
+class Experience(BaseModel):
+    company: str
+    title: str
+    description: str
+    duration: str
+
+class PastCourse(BaseModel):
+    title: str
+    description: str
+    numberOfStars: float
+
+class Professor(BaseModel):
+    fistname: str
+    lastname: str
+    city: str
+    description: str
+    diplomas: list[Diploma]
+    experiences: list[Experience]
+    pastCourses: list[PastCourse]
+
+class Course(BaseModel):
+    title: str
+    description: str
+
+class PredictionRequest(BaseModel):
+    professor: Professor
+    course: Course
+
+
+class BatchPredictionRequest(BaseModel):
+    items: list[PredictionRequest]
+
+class CourseRankingRequest(BaseModel):
+    professor: Professor
+    courses: list[Course]
+    k: int = Field(10, ge=1)
+
+class ProfessorMatchRequest(BaseModel):
+    course: Course
+    k: int = Field(10, ge=1)
+
+
+# ==========================
+# 🔹 LIGNES NDJSON
+# ==========================
+
+def parse_prediction_line(line: bytes):
+    """`(enregistrement, None)` si la ligne est une PredictionRequest valide, sinon `(None, erreur)`."""
+    try:
+        payload = json.loads(line)
+        if not isinstance(payload, dict):
+            return None, "objet JSON attendu"
+        return PredictionRequest(**payload).dict(), None
+    except ValidationError as e:
+        return None, "; ".join(f"{'.'.join(map(str, err['loc']))} : {err['msg']}" for err in e.errors())
+    except ValueError as e:
+        return None, f"JSON invalide : {e}"
+
+
+def ndjson_line(obj: dict) -> bytes:
+    return (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
@@ -2,10 +2,18 @@ import numpy as np
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 
+from src.keyword_matcher import KeywordMatcher
+from src.metrics import NO_TIMER
+from src.text_document import NormalizedDocument, tfidf_matrix
+
 # ==========================
 # 🔹 DICTIONNAIRES DE RÉFÉRENCE
 # ==========================
 
+# Version du calcul des features : à incrémenter à chaque changement de code
+# (invalide le cache de features d'entraînement, cf. src/feature_store.py)
+FEATURE_VERSION = 2
+
 # Pondération par niveau de diplôme
 DEGREE_LEVEL_SCORES = {
     "Certificat": 0.7,
@@ -30,6 +38,46 @@ DOMAIN_KEYWORDS = {
     "histoire": ["civilisation", "géographie", "société", "culture", "politique"]
 }
 
+# Détecteur construit une fois (src/keyword_matcher.py) : tous les domaines comptés en un appel
+_domain_matcher = KeywordMatcher(DOMAIN_KEYWORDS)
+
+
+# Vectoriseur TF-IDF ajusté une fois sur le corpus des profils (embarqué dans le transformeur du modèle)
+_vectorizer = None
+
+
+# ==========================
+# 🔹 VECTORISEUR TF-IDF
+# ==========================
+
+def build_profile_text(professor: dict, include_past_courses: bool = True) -> str:
+    """Texte global d'un profil : description + titres des diplômes, expériences et cours."""
+    parts = [
+        professor.get("description", "") or "",
+        " ".join(d.get("title", "") for d in professor.get("diplomas", []) or []),
+        " ".join(e.get("title", "") for e in professor.get("experiences", []) or []),
+    ]
+    if include_past_courses:
+        parts.append(" ".join(c.get("title", "") for c in professor.get("pastCourses", []) or []))
+    return " ".join(parts)
+
+
+def fit_vectorizer(corpus) -> TfidfVectorizer:
+    """Ajuste le vectoriseur TF-IDF sur un corpus de textes (itérable)."""
+    vectorizer = TfidfVectorizer(stop_words=None)
+    vectorizer.fit(corpus)
+    return vectorizer
+
+
+def set_vectorizer(vectorizer) -> None:
+    """Active un vectoriseur déjà ajusté (None revient à l'ajustement par paire)."""
+    global _vectorizer
+    _vectorizer = vectorizer
+
+
+def get_vectorizer():
+    return _vectorizer
+
 
 # ==========================
 # 🔹 UTILITAIRES DE TEXTE
@@ -39,20 +87,64 @@ def extract_domain_from_text(text: str) -> str:
     """Détecte le domaine dominant dans un texte."""
     if not isinstance(text, str) or not text.strip():
         return "autre"
-    text = text.lower()
-    domain_scores = {d: sum(k in text for k in kws) for d, kws in DOMAIN_KEYWORDS.items()}
-    return max(domain_scores, key=domain_scores.get)
+    return _domain_matcher.best(text.lower())
+
+
+def extract_domain(document: NormalizedDocument) -> str:
+    """Détecte le domaine dominant d'un document déjà normalisé (cf. src/text_document.py)."""
+    if document.is_blank:
+        return "autre"
+    return _domain_matcher.best(document.lower)
 
 
 def compute_similarity(text_a: str, text_b: str) -> float:
     """Mesure la similarité sémantique entre deux textes via TF-IDF."""
     if not text_a or not text_b:
         return 0.0
+    if _vectorizer is not None:
+        return float(compute_similarities([text_a], [text_b])[0])
+    # Repli historique : vectoriseur ajusté sur les deux seuls documents
     vectorizer = TfidfVectorizer(stop_words=None)
     tfidf = vectorizer.fit_transform([text_a, text_b])
     return float(cosine_similarity(tfidf[0:1], tfidf[1:2])[0][0])
 
 
+def compute_similarities(texts_a: list, texts_b: list, vectorizer=None) -> np.ndarray:
+    """Similarités cosinus de plusieurs paires de textes en une seule opération creuse.
+
+    `vectorizer` remplace le vectoriseur global (ex. celui d'une version du registre de modèles).
+    """
+    if len(texts_a) != len(texts_b):
+        raise ValueError("texts_a et texts_b doivent avoir la même longueur")
+    vectorizer = _vectorizer if vectorizer is None else vectorizer
+    if vectorizer is None:
+        return np.array([compute_similarity(a, b) for a, b in zip(texts_a, texts_b)], dtype=float)
+    if not texts_a:
+        return np.zeros(0)
+
+    # Les lignes TF-IDF sont normalisées (L2) : le produit scalaire est le cosinus
+    tfidf_a = vectorizer.transform([a or "" for a in texts_a])
+    return compute_similarities_to_vectors(tfidf_a, texts_b, vectorizer)
+
+
+def compute_similarities_to_vectors(tfidf_a, texts_b: list, vectorizer=None) -> np.ndarray:
+    """Similarités cosinus entre des lignes TF-IDF déjà calculées et des textes (vectoriseur requis)."""
+    tfidf_b = (_vectorizer if vectorizer is None else vectorizer).transform([b or "" for b in texts_b])
+    return np.asarray(tfidf_a.multiply(tfidf_b).sum(axis=1), dtype=float).ravel()
+
+
+def compute_similarities_to_documents(tfidf_a, documents_b: list, vectorizer=None) -> np.ndarray:
+    """Variante de `compute_similarities_to_vectors` sur des documents déjà découpés."""
+    tfidf_b = tfidf_matrix(documents_b, _vectorizer if vectorizer is None else vectorizer)
+    return np.asarray(tfidf_a.multiply(tfidf_b).sum(axis=1), dtype=float).ravel()
+
+
+def compute_similarities_to_vector(tfidf_row, documents_b: list, vectorizer=None) -> np.ndarray:
+    """Similarités cosinus d'une ligne TF-IDF avec chaque document : un produit matrice creuse x vecteur."""
+    tfidf_b = tfidf_matrix(documents_b, _vectorizer if vectorizer is None else vectorizer)
+    return np.asarray((tfidf_b @ tfidf_row.T).toarray(), dtype=float).ravel()
+
+
 def compute_degree_score(diplomas: list) -> float:
     """Score moyen selon le niveau de diplôme."""
     if not diplomas:
@@ -71,3 +163,60 @@ def compute_prestige_score(experiences: list) -> float:
         if any(p.lower() in company for p in PRESTIGIOUS_SCHOOLS):
             count += 1
     return round(count / len(experiences), 2)
+
+
+# ==========================
+# 🔹 FEATURES CÔTÉ PROFESSEUR
+# ==========================
+
+def compute_professor_features(professor: dict, vectorizer=None, timer=None, include_past_courses: bool = True,
+                               with_tfidf: bool = True) -> dict:
+    """Features ne dépendant que du professeur (réutilisables pour tous ses cours).
+
+    `timer` (optionnel, cf. src/metrics.py) chronomètre chaque étape du calcul.
+    `include_past_courses` : titres des cours passés inclus dans le texte du profil.
+    `with_tfidf=False` laisse `tfidf` à None (calculé ensuite pour tout un lot, cf.
+    `compute_professor_features_batch`).
+    """
+    vectorizer = _vectorizer if vectorizer is None else vectorizer
+    stage = (NO_TIMER if timer is None else timer).stage
+
+    with stage("text_assembly"):
+        profile_text = build_profile_text(professor, include_past_courses)
+        document = NormalizedDocument(profile_text)
+    with stage("domain_detection"):
+        prof_domain = extract_domain(document)
+    with stage("scoring"):
+        past_courses = professor.get("pastCourses", []) or []
+        degree_score = compute_degree_score(professor.get("diplomas", []) or [])
+        prestige_score = compute_prestige_score(professor.get("experiences", []) or [])
+        avg_stars = np.mean([c.get("numberOfStars", 4.0) for c in past_courses])
+        n_experiences = len(professor.get("experiences", []) or [])
+        n_diplomas = len(professor.get("diplomas", []) or [])
+    with stage("similarity"):
+        # Vecteur TF-IDF du profil (None sans vectoriseur persistant)
+        tfidf = tfidf_matrix([document], vectorizer) if with_tfidf and vectorizer is not None else None
+    return {
+        "profile_text": profile_text,
+        "document": document,
+        "prof_domain": prof_domain,
+        "degree_score": degree_score,
+        "prestige_score": prestige_score,
+        "avg_stars": avg_stars,
+        "n_experiences": n_experiences,
+        "n_diplomas": n_diplomas,
+        "tfidf": tfidf,
+    }
+
+
+def compute_professor_features_batch(professors, vectorizer=None, include_past_courses: bool = True) -> list:
+    """`compute_professor_features` pour tout un lot : les vecteurs TF-IDF des profils sortent d'un
+    seul `tfidf_matrix` (mêmes valeurs, sans le coût fixe d'un appel par professeur)."""
+    vectorizer = _vectorizer if vectorizer is None else vectorizer
+    features = [compute_professor_features(p, vectorizer, include_past_courses=include_past_courses, with_tfidf=False)
+                for p in professors]
+    if vectorizer is not None and features:
+        tfidf = tfidf_matrix([f["document"] for f in features], vectorizer)
+        for i, f in enumerate(features):
+            f["tfidf"] = tfidf[i]
+    return features
@@ -0,0 +1,104 @@
+import re
+from collections import Counter
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.preprocessing import normalize
+
+# === CONFIGURATION ===
+# Découpage par défaut de TfidfVectorizer : les tokens du document sont ceux du vectoriseur
+TOKEN_PATTERN = r"(?u)\b\w\w+\b"
+_token_re = re.compile(TOKEN_PATTERN)
+
+
+# ==========================
+# 🔹 DOCUMENT NORMALISÉ
+# ==========================
+
+class NormalizedDocument:
+    """Texte mis en minuscules et découpé une seule fois, partagé par tous les extracteurs.
+
+    `lower` sert à la détection de domaine (sous-chaînes), `counts` (token -> occurrences)
+    au vecteur TF-IDF : aucun extracteur ne repasse sur le texte brut. Le document d'un
+    professeur est mis en cache avec ses features et réutilisé pour tous ses cours.
+    """
+
+    __slots__ = ("text", "lower", "tokens", "counts")
+
+    def __init__(self, text: str):
+        self.text = text if isinstance(text, str) else ""
+        self.lower = self.text.lower()
+        self.tokens = _token_re.findall(self.lower)
+        self.counts = Counter(self.tokens)
+
+    @classmethod
+    def join(cls, documents):
+        """Documents joints par une espace, sans redécoupage : aucun token ne franchit l'espace."""
+        documents = list(documents)
+        doc = cls.__new__(cls)
+        doc.text = " ".join(d.text for d in documents)
+        doc.lower = " ".join(d.lower for d in documents)
+        doc.tokens = [t for d in documents for t in d.tokens]
+        doc.counts = Counter()
+        for d in documents:
+            doc.counts.update(d.counts)
+        return doc
+
+    @property
+    def is_blank(self) -> bool:
+        return not self.lower.strip()
+
+
+# ==========================
+# 🔹 VECTEURS TF-IDF
+# ==========================
+
+def token_compatible(vectorizer) -> bool:
+    """Vrai si le vectoriseur découpe comme NormalizedDocument (réglages par défaut de TfidfVectorizer)."""
+    return (
+        getattr(vectorizer, "analyzer", None) == "word"
+        and vectorizer.lowercase
+        and vectorizer.strip_accents is None
+        and vectorizer.preprocessor is None
+        and vectorizer.tokenizer is None
+        and vectorizer.token_pattern == TOKEN_PATTERN
+        and vectorizer.stop_words is None
+        and tuple(vectorizer.ngram_range) == (1, 1)
+        and not vectorizer.binary
+    )
+
+
+def tfidf_matrix(documents: list, vectorizer):
+    """Lignes TF-IDF des documents, identiques à `vectorizer.transform` sur leurs textes.
+
+    Les occurrences déjà comptées sont projetées sur le vocabulaire puis pondérées comme
+    TfidfVectorizer (idf, puis normalisation) ; un vectoriseur configuré autrement
+    retombe sur `vectorizer.transform`.
+    """
+    if not token_compatible(vectorizer):
+        return vectorizer.transform([d.text for d in documents])
+
+    vocabulary = vectorizer.vocabulary_
+    indices, data, indptr = [], [], [0]
+    for doc in documents:
+        for token, count in doc.counts.items():
+            j = vocabulary.get(token)
+            if j is not None:
+                indices.append(j)
+                data.append(count)
+        indptr.append(len(indices))
+    X = sp.csr_matrix(
+        (np.asarray(data, dtype=vectorizer.dtype), np.asarray(indices, dtype=np.int32),
+         np.asarray(indptr, dtype=np.int32)),
+        shape=(len(documents), len(vocabulary)),
+    )
+    X.sort_indices()
+
+    if vectorizer.sublinear_tf:
+        np.log(X.data, X.data)
+        X.data += 1.0
+    if vectorizer.use_idf:
+        X.data *= vectorizer.idf_[X.indices]
+    if vectorizer.norm is not None:
+        X = normalize(X, norm=vectorizer.norm, copy=False)
+    return X
@@ -0,0 +1,278 @@
+import argparse
+import io
+import time
+import warnings
+from pathlib import Path
+
+import joblib
+import numpy as np
+from sklearn.ensemble import GradientBoostingRegressor
+
+# === CONFIGURATION ===
+MODEL_PATH = Path("models/model_contextual_randomforest.pkl")
+FLAT_MODEL_PATH = MODEL_PATH.with_suffix(".npz")
+
+# Nombre de lignes traitées ensemble (borne la matrice lignes x arbres des nœuds courants)
+PREDICT_CHUNK_ROWS = 4096
+
+
+# ==========================
+# 🔹 ENSEMBLE D'ARBRES APLATI
+# ==========================
+
+class FlatTreeEnsemble:
+    """Forêt (ou boosting) aplatie en tableaux contigus, prédite en NumPy pur.
+
+    Tous les nœuds de tous les arbres sont concaténés et renumérotés pour que les deux enfants
+    d'un nœud soient adjacents : enfant gauche = `children[i]`, enfant droit = `children[i] + 1`.
+    Une feuille pointe sur elle-même avec un seuil +inf : après `max_depth` pas, chaque ligne
+    est sur une feuille de chaque arbre. prédiction = base + scale * somme des feuilles atteintes.
+    Une valeur manquante (NaN) suit le côté choisi par sklearn pour chaque nœud (`missing_left`,
+    copie de `tree_.missing_go_to_left`) : ex. `avg_stars` d'un professeur sans cours passés.
+    """
+
+    def __init__(self, feature, threshold, children, value, roots, base, scale, max_depth, feature_names_in_,
+                 missing_left=None):
+        if missing_left is None:
+            # Export antérieur à la prise en charge des NaN : tout à gauche, comme à l'époque
+            warnings.warn("Ensemble aplati sans missing_left (NaN envoyés à gauche) : le réexporter")
+            missing_left = np.ones(len(threshold), dtype=bool)
+        self.feature = np.ascontiguousarray(feature, dtype=np.uint16)
+        self.threshold = np.ascontiguousarray(threshold, dtype=np.float32)
+        self.children = np.ascontiguousarray(children, dtype=np.int32)
+        self.value = np.ascontiguousarray(value, dtype=np.float32)
+        self.roots = np.ascontiguousarray(roots, dtype=np.int32)
+        self.missing_left = np.ascontiguousarray(missing_left, dtype=bool)
+        self.base = float(base)
+        self.scale = float(scale)
+        self.max_depth = int(max_depth)
+        self.feature_names_in_ = np.asarray(feature_names_in_, dtype=str)
+
+    @property
+    def n_features_in_(self) -> int:
+        return len(self.feature_names_in_)
+
+    @property
+    def nbytes(self) -> int:
+        arrays = (self.feature, self.threshold, self.children, self.value, self.roots, self.missing_left)
+        return sum(a.nbytes for a in arrays)
+
+    def predict(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X doit avoir la forme (n, {self.n_features_in_}), reçu {X.shape}")
+        out = np.empty(len(X), dtype=np.float64)
+        for start in range(0, len(X), PREDICT_CHUNK_ROWS):
+            out[start:start + PREDICT_CHUNK_ROWS] = self._predict_chunk(X[start:start + PREDICT_CHUNK_ROWS])
+        return out
+
+    def _predict_chunk(self, X: np.ndarray) -> np.ndarray:
+        # Indices à plat dans X : ligne * n_features + feature du nœud courant
+        row_offsets = (np.arange(len(X), dtype=np.int64) * X.shape[1])[:, None]
+        X_flat = X.ravel()
+        nodes = np.broadcast_to(self.roots, (len(X), len(self.roots))).copy()
+        for _ in range(self.max_depth):
+            x = X_flat.take(row_offsets + self.feature.take(nodes))
+            go_right = x > self.threshold.take(nodes)
+            missing = np.isnan(x)
+            if missing.any():
+                # Les feuilles ont missing_left=True : une ligne arrivée sur une feuille y reste
+                go_right[missing] = ~self.missing_left.take(nodes[missing])
+            nodes = self.children.take(nodes) + go_right
+        leaf_sum = self.value[nodes].sum(axis=1, dtype=np.float64)
+        return self.base + self.scale * leaf_sum
+
+    def save(self, path: Path) -> None:
+        np.savez(
+            path,
+            feature=self.feature, threshold=self.threshold, children=self.children,
+            value=self.value, roots=self.roots, missing_left=self.missing_left,
+            base=np.float64(self.base), scale=np.float64(self.scale), max_depth=np.int64(self.max_depth),
+            feature_names_in_=self.feature_names_in_,
+        )
+
+    @classmethod
+    def load(cls, path: Path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(**{name: data[name] for name in data.files})
+
+
+def flatten_ensemble(model) -> FlatTreeEnsemble:
+    """Exporte un RandomForestRegressor / ExtraTreesRegressor / GradientBoostingRegressor ajusté."""
+    if isinstance(model, GradientBoostingRegressor):
+        trees = [est.tree_ for est in model.estimators_[:, 0]]
+        init = model.init_
+        if init == "zero":
+            base = 0.0
+        elif hasattr(init, "constant_"):
+            base = float(np.ravel(init.constant_)[0])
+        else:
+            raise ValueError(f"Estimateur initial non supporté : {init!r}")
+        scale = model.learning_rate
+    elif hasattr(model, "estimators_"):
+        trees = [est.tree_ for est in model.estimators_]
+        base, scale = 0.0, 1.0 / len(trees)
+    else:
+        raise ValueError(f"Modèle non supporté : {type(model).__name__}")
+
+    if model.n_features_in_ > np.iinfo(np.uint16).max:
+        raise ValueError("Trop de features pour un index uint16")
+    if getattr(trees[0], "n_outputs", 1) != 1:
+        raise ValueError("Seuls les modèles à une sortie sont supportés")
+
+    features, thresholds, children, values, roots, missing_left = [], [], [], [], [], []
+    offset = 0
+    for tree in trees:
+        order = _sibling_order(tree)
+        new_id = np.empty(tree.node_count, dtype=np.int64)
+        new_id[order] = np.arange(offset, offset + tree.node_count)
+
+        left = tree.children_left[order]
+        is_leaf = left == -1
+        features.append(np.where(is_leaf, 0, tree.feature[order]))
+        thresholds.append(np.where(is_leaf, np.inf, _float32_floor(tree.threshold[order])))
+        children.append(np.where(is_leaf, new_id[order], new_id[np.where(is_leaf, 0, left)]))
+        values.append(tree.value[order, 0, 0])
+        missing_left.append(is_leaf | tree.missing_go_to_left[order].astype(bool))
+        roots.append(offset)
+        offset += tree.node_count
+
+    names = getattr(model, "feature_names_in_", None)
+    if names is None:
+        names = [f"x{i}" for i in range(model.n_features_in_)]
+    return FlatTreeEnsemble(
+        feature=np.concatenate(features),
+        threshold=np.concatenate(thresholds),
+        children=np.concatenate(children),
+        value=np.concatenate(values),
+        roots=np.array(roots),
+        missing_left=np.concatenate(missing_left),
+        base=base,
+        scale=scale,
+        max_depth=max(tree.max_depth for tree in trees),
+        feature_names_in_=names,
+    )
+
+
+def _float32_floor(threshold: np.ndarray) -> np.ndarray:
+    """Plus grand float32 <= seuil float64 : pour x float32, `x <= t32` équivaut à `x <= t64` (sklearn)."""
+    t32 = threshold.astype(np.float32)
+    return np.where(t32 > threshold, np.nextafter(t32, np.float32(-np.inf)), t32)
+
+
+def _sibling_order(tree) -> np.ndarray:
+    """Ordre des nœuds (parcours en largeur) où l'enfant droit suit immédiatement l'enfant gauche."""
+    order = [0]
+    for node in order:
+        left = tree.children_left[node]
+        if left != -1:
+            order.extend((left, tree.children_right[node]))
+    return np.array(order, dtype=np.int64)
+
+
+# ==========================
+# 🔹 VÉRIFICATION ET COMPARAISON
+# ==========================
+
+def sample_inputs(flat: FlatTreeEnsemble, n_rows: int, seed: int = 0, nan_fraction: float = 0.05) -> np.ndarray:
+    """Lignes aléatoires sur la plage des seuils de chaque feature, dont la moitié des valeurs
+    prises juste autour d'un seuil (cas où l'arrondi float32 pourrait changer de branche),
+    et une fraction `nan_fraction` de valeurs manquantes."""
+    rng = np.random.default_rng(seed)
+    split = np.isfinite(flat.threshold)
+    X = np.zeros((n_rows, flat.n_features_in_), dtype=np.float32)
+    for f in range(flat.n_features_in_):
+        t = flat.threshold[split & (flat.feature == f)]
+        low, high = (float(t.min()), float(t.max())) if len(t) else (0.0, 1.0)
+        margin = max(high - low, 1.0) * 0.1
+        X[:, f] = rng.uniform(low - margin, high + margin, n_rows)
+        if len(t):
+            near = rng.random(n_rows) < 0.5
+            picked = rng.choice(t, near.sum())
+            X[near, f] = np.where(rng.random(near.sum()) < 0.5, picked, np.nextafter(picked, np.float32(np.inf)))
+    X[rng.random(X.shape) < nan_fraction] = np.nan
+    return X
+
+
+def reference_predict(model, X: np.ndarray) -> np.ndarray:
+    """Prédiction sklearn ; GradientBoostingRegressor refuse les NaN que ses arbres acceptent :
+    la somme de ses arbres sert alors de référence."""
+    if isinstance(model, GradientBoostingRegressor) and np.isnan(X).any():
+        base = 0.0 if model.init_ == "zero" else float(np.ravel(model.init_.constant_)[0])
+        trees = sum(est.predict(X) for est in model.estimators_[:, 0])
+        return base + model.learning_rate * trees
+    return model.predict(X)
+
+
+def check_predictions(model, flat: FlatTreeEnsemble, X: np.ndarray, atol: float = 1e-4) -> float:
+    """Écart maximal entre sklearn et la version aplatie ; lève une erreur au-delà de `atol`."""
+    expected = reference_predict(model, X)
+    max_err = float(np.max(np.abs(expected - flat.predict(X)))) if len(X) else 0.0
+    if max_err > atol:
+        raise AssertionError(f"Écart sklearn / ensemble aplati trop grand : {max_err:.2e} > {atol:.0e}")
+    return max_err
+
+
+def _median_latency_ms(predict, X, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        predict(X)
+        timings.append((time.perf_counter() - t0) * 1000)
+    return float(np.median(timings))
+
+
+def compare(model, flat: FlatTreeEnsemble, batch_sizes=(1, 100, 1000), repeat: int = 20) -> dict:
+    """Latence médiane (ms) par taille de lot et empreinte mémoire des deux représentations."""
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer)
+    report = {"sklearn_pickle_bytes": buffer.getbuffer().nbytes, "flat_array_bytes": flat.nbytes, "latency_ms": {}}
+    for n in batch_sizes:
+        X = sample_inputs(flat, n, seed=n, nan_fraction=0.0)
+        report["latency_ms"][n] = {
+            "sklearn": _median_latency_ms(model.predict, X, repeat),
+            "flat": _median_latency_ms(flat.predict, X, repeat),
+        }
+    return report
+
+
+# === EXPORT ===
+def main():
+    parser = argparse.ArgumentParser(description="Aplatit un ensemble d'arbres sklearn en tableaux NumPy (.npz).")
+    parser.add_argument("--model", type=Path, default=MODEL_PATH)
+    parser.add_argument("--out", type=Path, default=None)
+    parser.add_argument("--check-rows", type=int, default=5000)
+    parser.add_argument("--atol", type=float, default=1e-4)
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore", message="X does not have valid feature names")
+    artifact = joblib.load(args.model)
+    # Artefact transformeur + régresseur (src/feature_pipeline.py) : seul le régresseur est aplati
+    pipeline = artifact if hasattr(artifact, "regressor") else None
+    model = artifact.regressor if pipeline is not None else artifact
+    default_out = args.model.with_suffix(".flat.pkl" if pipeline is not None else ".npz")
+    out = args.out or default_out
+
+    flat = flatten_ensemble(model)
+    print(f"🌲 {len(flat.roots)} arbres, {len(flat.value)} nœuds, profondeur max {flat.max_depth}")
+
+    max_err = check_predictions(model, flat, sample_inputs(flat, args.check_rows), atol=args.atol)
+    print(f"✅ Prédictions identiques à sklearn (écart max {max_err:.2e} sur {args.check_rows} lignes)")
+
+    report = compare(model, flat)
+    print(f"💾 Mémoire : pickle sklearn {report['sklearn_pickle_bytes'] / 1e6:.2f} Mo, "
+          f"tableaux {report['flat_array_bytes'] / 1e6:.2f} Mo")
+    for n, lat in report["latency_ms"].items():
+        print(f"⏱️ {n:>5} ligne(s) : sklearn {lat['sklearn']:.2f} ms | aplati {lat['flat']:.2f} ms")
+
+    if pipeline is not None:
+        # Même transformeur, régresseur aplati : servi tel quel par l'API (--model ou registre)
+        joblib.dump(type(pipeline)(pipeline.features, flat), out)
+    else:
+        flat.save(out)
+    print(f"📦 Ensemble aplati sauvegardé dans : {out}")
+
+
+if __name__ == "__main__":
+    # Classes importées depuis src.tree_export (et non __main__) pour que le pickle de pipeline se recharge
+    from src import tree_export
+    tree_export.main()
@@ -0,0 +1,97 @@
+import json
+import os
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+from src import batch_scoring
+from src.batch_scoring import checkpoint_path, score_file
+from src.data_loader import iter_professors, normalize_professor, sample_courses
+from src.feature_pipeline import FeaturePipeline, FeatureTransformer
+from src.model_registry import load_artifact
+
+DATA_PATH = "data/data_train.json"
+
+
+@pytest.fixture
+def model(tmp_path):
+    features = FeatureTransformer()
+    rng = np.random.default_rng(0)
+    X = rng.random((200, len(features.feature_names)))
+    regressor = RandomForestRegressor(n_estimators=5, random_state=0).fit(X, 1 + 4 * X[:, 0])
+    path = tmp_path / "model.pkl"
+    joblib.dump(FeaturePipeline(features, regressor), path)
+    return load_artifact(path)
+
+
+@pytest.fixture
+def input_path(tmp_path):
+    records = [r for _, r in zip(range(6), iter_professors(DATA_PATH))]
+    courses = sample_courses(records)
+    lines = [json.dumps({"professor": normalize_professor(r), "course": courses[i % len(courses)]})
+             for i, r in enumerate(records)]
+    lines[3] = '{"professor": {}}'  # ligne invalide : une erreur en sortie, à la même place
+    lines.insert(2, "")
+    path = tmp_path / "in.jsonl"
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return path
+
+
+@pytest.fixture
+def chunk_calls(monkeypatch):
+    calls = []
+    score_chunk = batch_scoring._score_chunk
+
+    def counted(chunk):
+        calls.append(chunk)
+        return score_chunk(chunk)
+
+    monkeypatch.setattr(batch_scoring, "_score_chunk", counted)
+    monkeypatch.setattr(batch_scoring, "CHECKPOINT_EVERY", 1)
+    return calls
+
+
+def test_resume_after_interruption_matches_full_run(tmp_path, model, input_path, chunk_calls, monkeypatch):
+    reference = tmp_path / "reference.jsonl"
+    stats = score_file(model, input_path, reference, chunk_size=2)
+    assert (stats["scored"], stats["errors"]) == (5, 1)
+
+    # Interruption au troisième bloc, puis lignes écrites après le dernier point de reprise
+    score_chunk = batch_scoring._score_chunk
+
+    def interrupted(chunk):
+        if len(chunk_calls) == 2:
+            raise KeyboardInterrupt
+        return score_chunk(chunk)
+
+    out = tmp_path / "out.jsonl"
+    chunk_calls.clear()
+    monkeypatch.setattr(batch_scoring, "_score_chunk", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        score_file(model, input_path, out, chunk_size=2)
+    with open(out, "ab") as f:
+        f.write(b'{"gradeAverage": 0.0}\n')
+
+    monkeypatch.setattr(batch_scoring, "_score_chunk", score_chunk)
+    chunk_calls.clear()
+    assert score_file(model, input_path, out, chunk_size=2) == stats
+    assert len(chunk_calls) == 1
+    assert out.read_bytes() == reference.read_bytes()
+
+
+def test_rewritten_artifact_invalidates_checkpoint(tmp_path, model, input_path, chunk_calls):
+    out = tmp_path / "out.jsonl"
+    score_file(model, input_path, out, chunk_size=2)
+    chunk_calls.clear()
+    score_file(model, input_path, out, chunk_size=2)
+    assert chunk_calls == []  # entrée déjà notée : rien à refaire
+
+    # Même version ("legacy-full"), artefact réentraîné sur place
+    stat = os.stat(model.source)
+    os.utime(model.source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    score_file(model, input_path, out, chunk_size=2)
+    assert len(chunk_calls) == 3
+    with open(checkpoint_path(out), encoding="utf-8") as f:
+        assert json.load(f)["config"]["model_mtime_ns"] == os.stat(model.source).st_mtime_ns
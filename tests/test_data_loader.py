@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+from src import data_loader
+from src.data_loader import iter_professor_chunks, iter_professors
+
+RECORDS = [
+    {"fistname": "Ada", "description": "Algèbre, \"analyse\" et [crochets] {accolades}", "diplomas": []},
+    {"fistname": "Émile", "pastCourses": [{"title": "Chimie", "numberOfStars": 4.5}], "experiences": [{}]},
+    {},
+    {"description": "x" * 300, "nested": {"a": [1, 2, {"b": None}]}},
+]
+
+
+@pytest.fixture
+def small_reads(monkeypatch):
+    # Lectures de quelques caractères : les objets sont coupés entre deux blocs
+    monkeypatch.setattr(data_loader, "READ_SIZE", 7)
+
+
+def write(tmp_path, text: str, encoding: str = "utf-8", name: str = "data.json"):
+    path = tmp_path / name
+    path.write_text(text, encoding=encoding)
+    return path
+
+
+@pytest.mark.parametrize("indent", [None, 2])
+def test_array_matches_json_load(tmp_path, small_reads, indent):
+    path = write(tmp_path, "\n  " + json.dumps(RECORDS, ensure_ascii=False, indent=indent) + "\n")
+    with open(path, encoding="utf-8") as f:
+        assert list(iter_professors(path)) == json.load(f)
+
+
+def test_jsonl_and_empty_array(tmp_path, small_reads):
+    path = write(tmp_path, "\n".join(json.dumps(r) for r in RECORDS) + "\n\n")
+    assert list(iter_professors(path)) == RECORDS
+    assert list(iter_professors(write(tmp_path, " [ ] ", name="empty.json"))) == []
+    assert [len(c) for c in iter_professor_chunks(path, chunk_size=3)] == [3, 1]
+
+
+@pytest.mark.parametrize("fmt", ["array", "jsonl"])
+def test_utf8_bom_is_skipped(tmp_path, fmt):
+    text = json.dumps(RECORDS, ensure_ascii=False) if fmt == "array" else "\n".join(map(json.dumps, RECORDS))
+    path = write(tmp_path, text, encoding="utf-8-sig")
+    assert list(iter_professors(path)) == RECORDS
+
+
+@pytest.mark.parametrize("text", [
+    '[{"a": 1},]',
+    '[{"a": 1}, ]',
+    "[,]",
+    '[, {"a": 1}]',
+    '[{"a": 1} {"b": 2}]',
+    '[{"a": 1},,{"b": 2}]',
+    '[{"a": 1}',
+    '[{"a": 1},',
+    '[{"a": 1]',
+    '[{"a": 1}] x',
+    '[{"a": 1}] []',
+    "nope",
+])
+def test_malformed_array_raises_like_json_load(tmp_path, small_reads, text):
+    path = write(tmp_path, text)
+    with pytest.raises(ValueError):
+        json.loads(text)
+    with pytest.raises(ValueError):
+        list(iter_professors(path))
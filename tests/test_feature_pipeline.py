@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from src.data_loader import iter_professors
+from src.feature_pipeline import FeatureTransformer
+from src.model_training_contextual import domain_courses
+from src.smart_predictor import build_profile_text, fit_vectorizer
+
+DATA_PATH = "data/data_train.json"
+
+
+@pytest.fixture(scope="module")
+def professors():
+    return [r for _, r in zip(range(40), iter_professors(DATA_PATH))]
+
+
+@pytest.mark.parametrize("with_vectorizer", [True, False])
+def test_transform_grid_matches_per_pair_transform(professors, with_vectorizer):
+    vectorizer = fit_vectorizer(build_profile_text(p) for p in professors) if with_vectorizer else None
+    features = FeatureTransformer(vectorizer, include_past_courses=False)
+    courses = domain_courses() + [{"title": "Algèbre linéaire", "description": ""}]
+    sample = professors if with_vectorizer else professors[:5]  # repli : TF-IDF ajusté paire par paire
+
+    prof_features = features.professor_features_batch(sample)
+    grid = features.transform_grid(prof_features, courses)
+    pairs = features.transform([{"professor": p, "course": c} for p in sample for c in courses])
+    np.testing.assert_allclose(grid, pairs, atol=1e-6)
+    assert features.transform_grid([], courses).shape == (0, len(features.feature_names))
@@ -0,0 +1,45 @@
+import random
+
+import pytest
+
+from src.keyword_matcher import KeywordMatcher
+from src.smart_predictor import DOMAIN_KEYWORDS
+
+
+def substring_counts(keywords_by_label: dict, text: str) -> dict:
+    return {label: sum(k in text for k in kws) for label, kws in keywords_by_label.items()}
+
+
+def _texts(keywords_by_label: dict, n: int = 300, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    vocabulary = [k for kws in keywords_by_label.values() for k in kws if k] + ["le", "cours", "de", "é", "x"]
+    texts = ["", " ", "mathématiques", "algèbrealgèbre"]
+    for _ in range(n):
+        words = rng.choices(vocabulary, k=rng.randint(0, 12))
+        # Mots collés ou coupés : sous-chaînes et chevauchements
+        words = [w[: rng.randint(1, len(w))] if rng.random() < 0.2 else w for w in words]
+        texts.append(rng.choice(["", " "]).join(words))
+    return texts
+
+
+@pytest.mark.parametrize("scan_max_keywords", [0, 10_000])
+def test_count_matches_substring_scan(scan_max_keywords):
+    # 0 : automate Aho-Corasick ; 10 000 : recherche `k in text`
+    matcher = KeywordMatcher(DOMAIN_KEYWORDS, scan_max_keywords=scan_max_keywords)
+    for text in _texts(DOMAIN_KEYWORDS):
+        assert matcher.count(text) == substring_counts(DOMAIN_KEYWORDS, text), text
+
+
+@pytest.mark.parametrize("scan_max_keywords", [0, 10_000])
+def test_overlapping_shared_and_empty_keywords(scan_max_keywords):
+    keywords = {"a": ["he", "she", "hers", ""], "b": ["his", "she", "she"], "c": []}
+    matcher = KeywordMatcher(keywords, scan_max_keywords=scan_max_keywords)
+    for text in ["", "ushers", "this is hers", "shehis"] + _texts(keywords, 100):
+        assert matcher.count(text) == substring_counts(keywords, text), text
+    assert matcher.best("ushers") == "a"
+    assert KeywordMatcher({"a": ["he"], "b": ["his"]}, scan_max_keywords=scan_max_keywords).best("his") == "b"
+
+
+def test_default_uses_substring_scan_for_domain_keywords():
+    assert KeywordMatcher(DOMAIN_KEYWORDS)._scan is not None
+    assert KeywordMatcher({"x": [str(i) for i in range(500)]})._scan is None
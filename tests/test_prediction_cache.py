@@ -0,0 +1,98 @@
+import threading
+import time
+
+import pytest
+
+from src.feature_cache import ProfessorFeatureCache, payload_hash
+from src.prediction_cache import PredictionCache
+
+PAYLOAD = {"professor": {"description": "Machine learning", "diplomas": []},
+           "course": {"title": "Algèbre", "description": "Cours"}}
+
+
+def test_key_ignores_key_order_but_not_whitespace():
+    reordered = {"course": dict(reversed(list(PAYLOAD["course"].items()))), "professor": PAYLOAD["professor"]}
+    spaced = {**PAYLOAD, "course": {**PAYLOAD["course"], "title": "Algèbre  "}}
+    inner = {**PAYLOAD, "professor": {**PAYLOAD["professor"], "description": "Machine  learning"}}
+
+    key = PredictionCache.key(PAYLOAD, "v1")
+    assert PredictionCache.key(reordered, "v1") == key
+    assert PredictionCache.key(spaced, "v1") != key
+    assert PredictionCache.key(inner, "v1") != key
+    assert PredictionCache.key(PAYLOAD, "v2") != key
+    # Dédoublonnage du nettoyage : espaces fusionnés à la demande seulement
+    assert payload_hash(inner, collapse_whitespace=True) == payload_hash(PAYLOAD, collapse_whitespace=True)
+
+
+def test_professor_cache_keeps_whitespace_variants_apart():
+    cache = ProfessorFeatureCache(maxsize=8)
+    first = cache.get_or_compute({"description": "a  b"}, lambda p: p["description"])
+    second = cache.get_or_compute({"description": "a b"}, lambda p: p["description"])
+    assert (first, second) == ("a  b", "a b")
+
+
+def _concurrent(cache, key, compute, n):
+    results, errors = [], []
+
+    def call():
+        try:
+            results.append(cache.get_or_compute(key, compute))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(n)]
+    for t in threads:
+        t.start()
+    return threads, results, errors
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+@pytest.mark.parametrize("n", [2, 16])
+def test_concurrent_identical_requests_compute_once(n):
+    cache = PredictionCache(maxsize=16)
+    key = PredictionCache.key(PAYLOAD, "v1")
+    calls, release = [], threading.Event()
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return 4.2
+
+    threads, results, errors = _concurrent(cache, key, compute, n)
+    # Toutes les requêtes sont arrivées pendant le calcul de la première
+    _wait_for(lambda: cache.stats()["coalesced"] == n - 1)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1 and not errors
+    assert sorted(status for _, status in results) == ["coalesced"] * (n - 1) + ["miss"]
+    assert {value for value, _ in results} == {4.2}
+    assert cache.get_or_compute(key, compute) == (4.2, "hit")
+    assert len(calls) == 1
+
+
+def test_error_is_shared_by_waiters_and_not_cached():
+    cache = PredictionCache(maxsize=16)
+    key = PredictionCache.key(PAYLOAD, "v1")
+    release = threading.Event()
+
+    def failing():
+        release.wait(5)
+        raise RuntimeError("modèle indisponible")
+
+    threads, results, errors = _concurrent(cache, key, failing, 4)
+    _wait_for(lambda: cache.stats()["coalesced"] == 3)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert not results and len(errors) == 4
+    assert cache.stats()["in_flight"] == 0
+    assert cache.get_or_compute(key, lambda: 1.0) == (1.0, "miss")
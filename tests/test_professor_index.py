@@ -0,0 +1,48 @@
+import pickle
+
+import pytest
+
+from src.data_loader import iter_professors
+from src.feature_pipeline import FeatureTransformer
+from src.professor_index import ProfessorIndex, build_index
+from src.smart_predictor import build_profile_text, fit_vectorizer, set_vectorizer
+
+DATA_PATH = "data/data_train.json"
+
+
+@pytest.fixture
+def index_and_vectorizer(tmp_path):
+    records = [r for _, r in zip(range(30), iter_professors(DATA_PATH))]
+    vectorizer = fit_vectorizer(build_profile_text(p) for p in records)
+    set_vectorizer(vectorizer)
+    try:
+        build_index(records, tmp_path / "index")
+    finally:
+        set_vectorizer(None)
+    return ProfessorIndex.load(tmp_path / "index"), vectorizer, records
+
+
+def test_same_vectorizer_is_compatible(index_and_vectorizer):
+    index, vectorizer, _ = index_and_vectorizer
+    assert index.incompatibility(FeatureTransformer(vectorizer)) is None
+    # Vectoriseur rechargé depuis un artefact : même empreinte
+    assert index.incompatibility(FeatureTransformer(pickle.loads(pickle.dumps(vectorizer)))) is None
+    assert len(index.similarities("mathématiques", vectorizer)) == len(index)
+
+
+def test_vectorizer_with_same_vocabulary_size_is_rejected(index_and_vectorizer):
+    index, vectorizer, records = index_and_vectorizer
+    # Même vocabulaire, autre corpus (documents répétés) : seuls les IDF changent
+    texts = [build_profile_text(p) for p in records]
+    other = fit_vectorizer(texts + texts[:10])
+    assert len(other.vocabulary_) == len(vectorizer.vocabulary_)
+
+    reason = index.incompatibility(FeatureTransformer(other))
+    assert reason is not None and "autre vectoriseur" in reason
+    with pytest.raises(RuntimeError):
+        index.similarities("mathématiques", other)
+
+
+def test_other_profile_text_is_rejected(index_and_vectorizer):
+    index, vectorizer, _ = index_and_vectorizer
+    assert "texte de profil" in index.incompatibility(FeatureTransformer(vectorizer, include_past_courses=False))
@@ -0,0 +1,68 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+import app
+
+
+class FakeState:
+    def __init__(self, version):
+        self.version = version
+        self.source = f"fake/{version}"
+        self.schema = self
+
+    def empty(self, n_rows):
+        return np.zeros((n_rows, 1), dtype=np.float32)
+
+    def predict(self, X):
+        return np.zeros(len(X))
+
+    def predict_records(self, records):
+        return np.zeros(len(records))
+
+
+@pytest.fixture
+def slow_loader(monkeypatch):
+    loaded, release = [], threading.Event()
+
+    def load(version):
+        loaded.append(version)
+        if len(loaded) == 1:
+            release.wait(5)
+        return FakeState(version or "latest")
+
+    monkeypatch.setattr(app, "load_serving_model", load)
+    monkeypatch.setattr(app, "serving", app.serving)
+    return loaded, release
+
+
+def wait_idle(timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while app.reload_lock.locked():
+        assert time.monotonic() < deadline, "rechargement bloqué"
+        time.sleep(0.01)
+
+
+def test_signal_during_reload_is_replayed(slow_loader):
+    loaded, release = slow_loader
+    assert app.start_reload("v1")
+    # SIGHUP reçus pendant le chargement : le dernier est rejoué, aucun n'est perdu
+    assert not app.start_reload("v2", queue=True)
+    assert not app.start_reload(None, queue=True)
+    assert app.reload_status["queued"]
+    release.set()
+    wait_idle()
+    assert loaded == ["v1", None]
+    assert app.serving.version == "latest"
+    assert app.reload_status["state"] == "idle" and not app.reload_status["queued"]
+
+
+def test_unqueued_request_during_reload_is_refused(slow_loader):
+    loaded, release = slow_loader
+    assert app.start_reload("v1")
+    assert not app.start_reload("v2")
+    release.set()
+    wait_idle()
+    assert loaded == ["v1"]
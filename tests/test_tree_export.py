@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import ExtraTreesRegressor, GradientBoostingRegressor, RandomForestRegressor
+
+from src.tree_export import FlatTreeEnsemble, check_predictions, flatten_ensemble, reference_predict, sample_inputs
+
+
+def _training_data(seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(400, 5))
+    y = X[:, 0] - 2 * X[:, 1] + rng.normal(scale=0.3, size=len(X))
+    return X, y
+
+
+@pytest.mark.parametrize("model", [
+    RandomForestRegressor(n_estimators=10, random_state=0),
+    ExtraTreesRegressor(n_estimators=10, random_state=0),
+    GradientBoostingRegressor(n_estimators=30, random_state=0),
+])
+def test_flat_matches_sklearn_with_missing_values(model):
+    X, y = _training_data()
+    model.fit(X, y)
+    flat = flatten_ensemble(model)
+    X_check = sample_inputs(flat, 2000, nan_fraction=0.2)
+    assert np.isnan(X_check).any()
+    assert check_predictions(model, flat, X_check) < 1e-4
+
+
+def test_nan_follows_missing_go_to_left():
+    # Arbres ajustés avec des NaN : sklearn choisit le côté des valeurs manquantes à chaque nœud
+    X, y = _training_data(1)
+    X[::4, 0] = np.nan
+    model = RandomForestRegressor(n_estimators=10, random_state=0).fit(X, y)
+    flat = flatten_ensemble(model)
+    X_nan = np.tile(np.float32([np.nan, 0.5, -0.5, 0.0, 1.0]), (3, 1))
+    np.testing.assert_allclose(flat.predict(X_nan), reference_predict(model, X_nan), atol=1e-5)
+
+
+def test_save_load_keeps_missing_routing(tmp_path):
+    X, y = _training_data()
+    model = RandomForestRegressor(n_estimators=5, random_state=0).fit(X, y)
+    flat = flatten_ensemble(model)
+    flat.save(tmp_path / "model.npz")
+    loaded = FlatTreeEnsemble.load(tmp_path / "model.npz")
+    np.testing.assert_array_equal(loaded.missing_left, flat.missing_left)
+    X_check = sample_inputs(flat, 500, nan_fraction=0.2)
+    np.testing.assert_array_equal(loaded.predict(X_check), flat.predict(X_check))